@@ -0,0 +1,146 @@
+"""
+Token authentication without a database query per request.
+
+Tokens resolve to a snapshot of the user's fields, kept in a bounded
+per-process LRU and, when ``AUTH_TOKEN_SHARED_CACHE`` is on, in the
+shared cache as well. Entries expire after ``AUTH_TOKEN_CACHE_TIMEOUT``
+seconds and are checked against a per-token version (``core.versions``)
+that logout, password changes, ``is_active`` toggles and any other save
+of the user bump once committed. A version the cache has lost reads back
+as a new one, so an evicted key sends the token to the database rather
+than reviving an entry cached before a logout.
+
+Snapshots leave out the password and the denormalized counters; they
+load from the database on access, and ``save()`` on the cached user
+only writes the fields it holds.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from core import versions
+
+User = get_user_model()
+
+_lock = threading.Lock()
+_tokens = OrderedDict()
+
+
+def get_auth_version_key(key):
+    return f'auth-token-version:{key}'
+
+
+def get_snapshot_fields():
+    return [
+        field.attname for field in User._meta.concrete_fields
+        if field.primary_key
+        or (field.editable and field.name != 'password')
+    ]
+
+
+def remember(key, entry):
+    with _lock:
+        _tokens[key] = entry
+        _tokens.move_to_end(key)
+        while len(_tokens) > settings.AUTH_TOKEN_CACHE_SIZE:
+            _tokens.popitem(last=False)
+
+
+def forget(key):
+    with _lock:
+        _tokens.pop(key, None)
+
+
+def recall(key):
+    with _lock:
+        entry = _tokens.get(key)
+        if entry is not None:
+            _tokens.move_to_end(key)
+        return entry
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+
+    def get_cached_user(self, key, version):
+        entry = recall(key)
+        if entry is None and settings.AUTH_TOKEN_SHARED_CACHE:
+            entry = cache.get(f'auth-token:{key}')
+            if entry is not None:
+                remember(key, entry)
+        if entry is None:
+            return None
+
+        entry_version, expires, values = entry
+        if entry_version != version or expires < time.time():
+            return None
+        return User.from_db(User.objects.db, get_snapshot_fields(), values)
+
+    def get_token_user(self, key):
+        # The same as the parent, but from the primary: a token issued
+        # a moment ago may not have reached the replicas yet
+        model = self.get_model()
+        try:
+            token = model.objects.using(
+                router.db_for_write(model)
+            ).select_related('user').get(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+        return token.user, token
+
+    def authenticate_credentials(self, key):
+        # Read before the database, so a change made meanwhile can't be
+        # cached under the version that follows it
+        version = versions.get_version(get_auth_version_key(key))
+        user = self.get_cached_user(key, version)
+        if user is not None:
+            token = Token(key=key, user_id=user.pk)
+            token.user = user
+            return user, token
+
+        user, token = self.get_token_user(key)
+
+        timeout = settings.AUTH_TOKEN_CACHE_TIMEOUT
+        values = [getattr(user, field) for field in get_snapshot_fields()]
+        entry = (version, time.time() + timeout, values)
+        remember(key, entry)
+        if settings.AUTH_TOKEN_SHARED_CACHE:
+            cache.set(f'auth-token:{key}', entry, timeout)
+        return user, token
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(instance, update_fields=None, **kwargs):
+    # djoser's login only touches last_login
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    for key in Token.objects.filter(user=instance).values_list(
+        'key', flat=True
+    ):
+        versions.bump_version_on_commit(get_auth_version_key(key))
+
+
+def revoke(key):
+    versions.bump_version(get_auth_version_key(key))
+    forget(key)
+    cache.delete(f'auth-token:{key}')
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_token(instance, **kwargs):
+    key = instance.key
+    transaction.on_commit(lambda: revoke(key))
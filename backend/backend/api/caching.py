@@ -0,0 +1,178 @@
+"""
+Conditional GET and response cache for the read API.
+
+Every read response is described by the generations of the resources
+it is built from and, for authenticated users, by the version of their
+own favourite, basket and subscription state. Writes bump those
+counters once they commit, so an ETag derived from them changes
+exactly when the response could, and a matching ``If-None-Match`` is
+answered with 304 before the queryset or serializers run.
+
+Anonymous requests get the same answer for every visitor, so their
+rendered body is also cached under the same validator.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import (parse_etags, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import urlencode
+
+from core import versions
+from core.models import BasketUser
+from recipes.models import (FavouriteRecipe, Follow, Ingredient,
+                            IngredientRecipe, Recipe, Tag)
+
+User = get_user_model()
+
+RECIPES = 'recipes'
+TAGS = 'tags'
+INGREDIENTS = 'ingredients'
+USERS = 'users'
+
+
+def get_generation_key(resource):
+    return f'generation:{resource}'
+
+
+def get_user_state_key(user_id):
+    return f'user-state:{user_id}'
+
+
+def bump_user_state(user_id):
+    versions.bump_version_on_commit(get_user_state_key(user_id))
+
+
+def bump_generations(*resources):
+    for resource in resources:
+        versions.bump_version_on_commit(get_generation_key(resource))
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+@receiver((post_save, post_delete), sender=IngredientRecipe)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipes(**kwargs):
+    if not kwargs.get('action', 'post_').startswith('pre_'):
+        bump_generations(RECIPES)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def invalidate_tags(**kwargs):
+    bump_generations(TAGS, RECIPES)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredients(**kwargs):
+    bump_generations(INGREDIENTS, RECIPES)
+
+
+@receiver((post_save, post_delete), sender=User)
+def invalidate_users(update_fields=None, **kwargs):
+    # Logins only touch last_login, which no response shows
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        bump_generations(USERS, RECIPES)
+
+
+@receiver((post_save, post_delete), sender=FavouriteRecipe)
+@receiver((post_save, post_delete), sender=BasketUser)
+@receiver((post_save, post_delete), sender=Follow)
+def invalidate_user_state(instance, **kwargs):
+    bump_user_state(instance.user_id)
+
+
+def get_query_string(request):
+    return urlencode(sorted(
+        (name, sorted(values))
+        for name, values in request.query_params.lists()
+    ), doseq=True)
+
+
+def set_validators(response, etag):
+    # No Last-Modified: whole seconds can't tell apart two writes made
+    # within the same second, and the ETag already covers every change
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, no_cache=True)
+    patch_vary_headers(response, ('Accept', 'Authorization'))
+    return response
+
+
+class CachedReadMixin:
+    """Conditional GET for ``list`` and ``retrieve``, plus a body cache
+    for anonymous JSON requests.
+
+    ``cache_resources`` names the generations the responses depend on.
+    Other read actions can opt in by returning
+    ``self.get_cached_response(handler, request)``.
+    """
+    cache_resources = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(super().list, request,
+                                        *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(super().retrieve, request,
+                                        *args, **kwargs)
+
+    def get_etag(self, request):
+        """Return the ETag of the response, computed from version
+        counters only."""
+        keys = [get_generation_key(resource)
+                for resource in self.cache_resources]
+        user = request.user
+        if user.is_authenticated:
+            keys.append(get_user_state_key(user.pk))
+        current = versions.get_versions(keys)
+
+        validator = ':'.join((
+            *map(str, current),
+            str(user.pk),
+            request.accepted_renderer.format or '',
+            # Bodies hold absolute image links, which differ by host
+            request.scheme,
+            request.get_host(),
+            request.path,
+            get_query_string(request),
+        ))
+        return f'W/"{hashlib.sha1(validator.encode()).hexdigest()}"'
+
+    def is_not_modified(self, request, etag):
+        etags = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+        return etag in etags or '*' in etags
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        if self.is_not_modified(request, etag):
+            return set_validators(HttpResponseNotModified(), etag)
+
+        if (
+            request.user.is_authenticated
+            or request.accepted_renderer.format != 'json'
+        ):
+            response = handler(request, *args, **kwargs)
+            if response.status_code == 200:
+                set_validators(response, etag)
+            return response
+
+        cache_key = f'response:{etag}'
+        entry = cache.get(cache_key)
+
+        if entry is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            response.accepted_renderer = request.accepted_renderer
+            response.accepted_media_type = request.accepted_media_type
+            response.renderer_context = self.get_renderer_context()
+            entry = (response.render().content, response['Content-Type'])
+            cache.set(cache_key, entry, settings.RESPONSE_CACHE_TIMEOUT)
+
+        content, content_type = entry
+        return set_validators(
+            HttpResponse(content, content_type=content_type), etag
+        )
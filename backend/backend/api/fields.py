@@ -0,0 +1,65 @@
+import base64
+import binascii
+import uuid
+
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from drf_extra_fields.fields import Base64ImageField
+from PIL import Image
+from rest_framework import serializers
+
+BASE64_HEADER = ';base64,'
+# Characters read per step; whitespace is dropped and whatever doesn't
+# fill a whole 4-character group is carried over to the next step
+DECODE_CHUNK_SIZE = 64 * 1024
+
+
+class StreamingBase64ImageField(Base64ImageField):
+    """``Base64ImageField`` that decodes the payload chunk by chunk into a
+    temporary file instead of building the whole image in memory.
+
+    The file storage then moves the temporary file into place, and image
+    validation reads it from disk.
+    """
+    ALLOWED_TYPES = Base64ImageField.ALLOWED_TYPES + ('webp',)
+
+    def to_internal_value(self, base64_data):
+        if base64_data in self.EMPTY_VALUES:
+            return None
+        if not isinstance(base64_data, str):
+            raise ValidationError(self.INVALID_FILE_MESSAGE)
+
+        start = base64_data.find(BASE64_HEADER)
+        start = 0 if start == -1 else start + len(BASE64_HEADER)
+
+        uploaded = TemporaryUploadedFile(
+            'image', 'application/octet-stream', None, None
+        )
+        try:
+            carry = ''
+            for offset in range(start, len(base64_data), DECODE_CHUNK_SIZE):
+                chunk = carry + ''.join(
+                    base64_data[offset:offset + DECODE_CHUNK_SIZE].split()
+                )
+                end = len(chunk) - len(chunk) % 4
+                uploaded.write(base64.b64decode(chunk[:end]))
+                carry = chunk[end:]
+            if carry:
+                # Not a whole group, which fails as incorrect padding
+                uploaded.write(base64.b64decode(carry))
+            uploaded.size = uploaded.tell()
+            uploaded.seek(0)
+            with Image.open(uploaded) as image:
+                extension = (image.format or '').lower()
+            uploaded.seek(0)
+        except (binascii.Error, ValueError, OSError,
+                Image.DecompressionBombError):
+            uploaded.close()
+            raise ValidationError(self.INVALID_FILE_MESSAGE)
+
+        if extension not in self.ALLOWED_TYPES:
+            uploaded.close()
+            raise ValidationError(self.INVALID_TYPE_MESSAGE)
+
+        uploaded.name = f'{uuid.uuid4()}.{extension}'
+        return serializers.ImageField.to_internal_value(self, uploaded)
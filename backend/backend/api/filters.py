@@ -1,15 +1,21 @@
 from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef
 from django_filters.rest_framework import FilterSet, filters
 
 from recipes.models import Recipe
+from recipes.tags import RecipeTag, get_slug_choices, get_tag_index
 
 User = get_user_model()
 
+# Above this many matching recipes the tag filter runs as an EXISTS
+# subquery instead of an id list
+MAX_TAG_FILTER_IDS = 1000
+
 
 class RecipeFilter(FilterSet):
-    tags = filters.AllValuesMultipleFilter(
-        field_name='tags__slug',
-        lookup_expr='contains',
+    tags = filters.MultipleChoiceFilter(
+        choices=get_slug_choices,
+        method='get_tags',
     )
     author = filters.ModelChoiceFilter(queryset=User.objects.all())
     is_favorited = filters.BooleanFilter(method='get_is_favorited')
@@ -21,6 +27,21 @@ class RecipeFilter(FilterSet):
         model = Recipe
         fields = ('tags', 'is_favorited', 'author', 'is_in_shopping_cart')
 
+    def get_tags(self, queryset, name, value):
+        tag_index = get_tag_index()
+        tag_ids = tag_index.get_tag_ids(value)
+        recipe_ids = tag_index.get_recipe_ids(tag_ids)
+
+        if len(recipe_ids) <= MAX_TAG_FILTER_IDS:
+            return queryset.filter(pk__in=recipe_ids)
+
+        return queryset.annotate(
+            has_tags=Exists(RecipeTag.objects.filter(
+                recipe_id=OuterRef('pk'),
+                tag_id__in=tag_ids,
+            ))
+        ).filter(has_tags=True)
+
     def get_is_favorited(self, queryset, name, value):
         if value and self.request.user.is_authenticated:
             return queryset.filter(
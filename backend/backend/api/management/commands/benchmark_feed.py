@@ -0,0 +1,72 @@
+"""
+Django command to compare feed serialization with and without snapshots.
+"""
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.views import RecipeViewSet
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """Time one feed page on both paths, queries included."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=50)
+        parser.add_argument('--page-size', type=int, default=6)
+        parser.add_argument('--user', help='email of the reader')
+
+    def get_view(self, action, user):
+        request = Request(APIRequestFactory().get('/api/recipes/'))
+        if user is not None:
+            request.user = user
+        return RecipeViewSet(action=action, request=request,
+                             format_kwarg=None)
+
+    def render_page(self, action, user, page_size):
+        # A new view per run, so nothing memoized on the request carries
+        # over; both paths fetch the same page shape and serialize it
+        view = self.get_view(action, user)
+        page = view.get_queryset().order_by('-pub_date', '-id')[:page_size]
+        serializer_class = view.get_serializer_class()
+        return serializer_class(
+            page, many=True, context=view.get_serializer_context()
+        ).data
+
+    def handle(self, *args, **options):
+        number = options['number']
+        page_size = options['page_size']
+        user = None
+        if options['user']:
+            user = User.objects.get(email=options['user'])
+
+        self.stdout.write(
+            f'page of {page_size} recipes, {number} runs per path, medians'
+        )
+        # 'retrieve' keeps the prefetching queryset and RecipeReadSerializer
+        for name, action in (('serializer', 'retrieve'),
+                             ('snapshots', 'list')):
+            # Warm up, so missing snapshots are built outside the timing
+            self.render_page(action, user, page_size)
+
+            wall, cpu, queries = [], [], []
+            for _ in range(number):
+                started, started_cpu = time.perf_counter(), time.process_time()
+                with CaptureQueriesContext(connection) as captured:
+                    self.render_page(action, user, page_size)
+                wall.append(time.perf_counter() - started)
+                cpu.append(time.process_time() - started_cpu)
+                queries.append(len(captured))
+            self.stdout.write(
+                f'{name:>10}: {statistics.median(wall) * 1000:.3f} ms, '
+                f'{statistics.median(cpu) * 1000:.3f} ms CPU, '
+                f'{statistics.median(queries):g} queries per page'
+            )
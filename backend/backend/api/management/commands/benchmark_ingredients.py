@@ -0,0 +1,44 @@
+"""
+Django command to compare the ingredient catalogue with the database.
+"""
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from recipes import catalogue
+from recipes.models import Ingredient
+from recipes.search import search_in_database
+
+
+class Command(BaseCommand):
+    """Time ingredient listing, search and lookups on both paths."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=200)
+        parser.add_argument('--query', default='сол')
+
+    def handle(self, *args, **options):
+        number = options['number']
+        query = options['query']
+        ids = list(Ingredient.objects.values_list('id', flat=True)[:30])
+        current = catalogue.get_catalogue()
+
+        cases = (
+            ('list', lambda: list(Ingredient.objects.all()),
+             lambda: catalogue.get_catalogue().all()),
+            ('search', lambda: list(search_in_database(query, 20)),
+             lambda: catalogue.get_catalogue().search(query, 20)),
+            ('lookup 30 ids', lambda: Ingredient.objects.in_bulk(ids),
+             lambda: catalogue.get_catalogue().in_bulk(ids)),
+        )
+
+        self.stdout.write(
+            f'{len(current)} ingredients, {number} runs per case'
+        )
+        for name, database, in_process in cases:
+            database_time = timeit.timeit(database, number=number)
+            catalogue_time = timeit.timeit(in_process, number=number)
+            self.stdout.write(
+                f'{name:>14}: database {database_time / number * 1000:.3f} '
+                f'ms, catalogue {catalogue_time / number * 1000:.3f} ms'
+            )
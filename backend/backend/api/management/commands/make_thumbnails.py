@@ -0,0 +1,52 @@
+"""
+Django command to render missing thumbnails of recipe images.
+"""
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+from recipes.thumbnails import (THUMBNAIL_FORMATS, THUMBNAIL_SIZES,
+                                get_thumbnail_name, make_thumbnails,
+                                mark_thumbnails_ready)
+
+
+class Command(BaseCommand):
+    """Backfill thumbnails of recipe images that have none yet.
+
+    Images whose variants are already stored are only marked ready;
+    ``--force`` renders every image again.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true')
+
+    def has_thumbnails(self, image_name):
+        return all(
+            default_storage.exists(
+                get_thumbnail_name(image_name, size, extension)
+            )
+            for size, _ in THUMBNAIL_SIZES
+            for extension, _, _ in THUMBNAIL_FORMATS
+        )
+
+    def handle(self, *args, **options):
+        rendered = 0
+        recipes = Recipe.objects.exclude(image='')
+        if not options['force']:
+            recipes = recipes.filter(thumbnails_ready=False)
+        image_names = recipes.order_by().values_list(
+            'image', flat=True
+        ).distinct()
+        for image_name in list(image_names):
+            if not options['force'] and self.has_thumbnails(image_name):
+                mark_thumbnails_ready(image_name)
+                continue
+            try:
+                make_thumbnails(image_name)
+            except OSError as error:
+                self.stderr.write(f'{image_name}: {error}')
+                continue
+            rendered += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered thumbnails of {rendered} images'
+        ))
@@ -0,0 +1,16 @@
+"""
+Django command to recompute the denormalized counters.
+"""
+from django.core.management.base import BaseCommand
+
+from core.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    """Fix drifted recipe, favourite, basket and follow counters."""
+
+    def handle(self, *args, **options):
+        drifted = reconcile_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f'Counters reconciled, {drifted} rows fixed'
+        ))
@@ -0,0 +1,43 @@
+"""
+Django command to run background jobs from the database queue.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.jobs import claim_job, purge_jobs, run_job
+
+
+class Command(BaseCommand):
+    """Django command to process queued jobs until stopped."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sleep', type=float, default=1.0,
+                            help='seconds to wait when the queue is empty')
+        parser.add_argument('--once', action='store_true',
+                            help='exit when the queue is empty')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Waiting for jobs...')
+        try:
+            while True:
+                close_old_connections()
+                job = claim_job()
+                if job is None:
+                    purged = purge_jobs()
+                    if purged:
+                        self.stdout.write(f'Purged {purged} old jobs')
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+                    continue
+
+                started = time.monotonic()
+                job = run_job(job)
+                self.stdout.write(
+                    f'{job.task} {job.pk}: {job.status} '
+                    f'in {time.monotonic() - started:.2f}s'
+                )
+        except KeyboardInterrupt:
+            pass
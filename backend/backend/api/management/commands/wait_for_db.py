@@ -1,9 +1,11 @@
 """
 Django command to wait for the database to be available.
 """
+import random
 import time
 
-from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
 from django.db import connections
 from django.db.utils import OperationalError
 from psycopg2 import OperationalError as Psycopg2OpError
@@ -12,17 +14,37 @@ from psycopg2 import OperationalError as Psycopg2OpError
 class Command(BaseCommand):
     """Django command to wait for database."""
 
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--timeout', type=float,
+                            default=settings.DB_WAIT_TIMEOUT)
+        parser.add_argument('--initial-delay', type=float, default=0.1)
+        parser.add_argument('--max-delay', type=float, default=5.0)
+
     def handle(self, *args, **options):
         """Entrypoint for command."""
         self.stdout.write('Waiting for database...')
-        db_up = False
-        while db_up is False:
+        db_conn = connections[options['database']]
+        deadline = time.monotonic() + options['timeout']
+        delay = options['initial_delay']
+
+        while True:
             try:
-                db_conn = connections['default']
-                db_conn.cursor()
-                db_up = True
-            except (Psycopg2OpError, OperationalError):
-                self.stdout.write('Database unavailable, waiting 1 second...')
-                time.sleep(1)
+                db_conn.ensure_connection()
+                break
+            except (Psycopg2OpError, OperationalError) as error:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CommandError(
+                        f'Database unavailable after '
+                        f'{options["timeout"]:g} seconds: {error}'
+                    )
+                # Full jitter, so restarting containers don't retry in step
+                pause = min(random.uniform(0, delay), remaining)
+                self.stdout.write(
+                    f'Database unavailable, waiting {pause:.2f} seconds...'
+                )
+                time.sleep(pause)
+                delay = min(delay * 2, options['max_delay'])
 
         self.stdout.write(self.style.SUCCESS('Database available!'))
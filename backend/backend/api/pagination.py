@@ -0,0 +1,131 @@
+import hashlib
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def get_cached_count(queryset):
+    """Row count of ``queryset``, cached for
+    ``PAGINATION_COUNT_CACHE_TIMEOUT`` seconds, so it may lag behind."""
+    try:
+        sql = str(queryset.query)
+    except EmptyResultSet:
+        return 0
+    cache_key = f'count:{hashlib.sha256(sql.encode("utf-8")).hexdigest()}'
+    count = cache.get(cache_key)
+    if count is None:
+        count = queryset.count()
+        cache.set(cache_key, count, settings.PAGINATION_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+class LimitPageNumberPagination(PageNumberPagination):
+    """Page number pagination, or keyset pagination when the request has
+    a ``cursor`` parameter (empty for the first page).
+
+    Keyset pages are ordered by ``keyset_ordering`` and continue after
+    the last row of the previous page instead of using OFFSET. They don't
+    report a total unless ``count=1`` is passed, and then it comes from
+    :func:`get_cached_count`.
+    """
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    keyset_ordering = ('id',)
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.count = None
+        if request.query_params.get(self.count_query_param) == '1':
+            self.count = get_cached_count(queryset)
+
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.keyset_ordering)
+        position = self.decode_cursor(
+            queryset.model, request.query_params[self.cursor_query_param]
+        )
+        if position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(position))
+
+        rows = list(queryset[:page_size + 1])
+        self.next_position = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            self.next_position = [
+                getattr(rows[-1], field.lstrip('-'))
+                for field in self.keyset_ordering
+            ]
+        return rows
+
+    def get_keyset_filter(self, position):
+        keyset_filter = Q()
+        for index, field in enumerate(self.keyset_ordering):
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            step = Q(**{f'{field.lstrip("-")}__{lookup}': position[index]})
+            for previous, value in zip(self.keyset_ordering[:index], position):
+                step &= Q(**{previous.lstrip('-'): value})
+            keyset_filter |= step
+        return keyset_filter
+
+    def encode_cursor(self, position):
+        values = [value.isoformat() if hasattr(value, 'isoformat')
+                  else value for value in position]
+        return urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, model, cursor):
+        if not cursor:
+            return None
+        try:
+            values = json.loads(urlsafe_b64decode(cursor.encode()))
+            if len(values) != len(self.keyset_ordering):
+                raise ValueError
+            return [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.keyset_ordering, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url,
+            self.cursor_query_param,
+            self.encode_cursor(self.next_position),
+        )
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+
+        content = [
+            ('next', self.get_next_link()),
+            ('previous', None),
+            ('results', data),
+        ]
+        if self.count is not None:
+            content.insert(0, ('count', self.count))
+        return Response(OrderedDict(content))
+
+
+class RecipePagination(LimitPageNumberPagination):
+    keyset_ordering = ('-pub_date', '-id')
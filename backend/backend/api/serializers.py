@@ -1,14 +1,24 @@
 from django.contrib.auth import get_user_model
-from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.urls import reverse
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
 
+from core.models import Job
+from recipes import catalogue
 from recipes.models import (FavouriteRecipe, Follow, Ingredient,
                             IngredientRecipe, Recipe, Tag)
+from recipes.thumbnails import get_thumbnail_urls, schedule_thumbnails
+
+from .fields import StreamingBase64ImageField
+from .user_state import get_user_state
+from .utils import get_recipes_limit
 
 User = get_user_model()
 
+MAX_BULK_RECIPES = 100
+
 
 class IngredientSerializer(serializers.ModelSerializer):
     class Meta:
@@ -64,13 +74,10 @@ class FoodUserSerializer(serializers.ModelSerializer):
                   'is_subscribed',)
 
     def get_is_subscribed(self, obj):
-        user = None
-        request = self.context.get('request')
-        if request and hasattr(request, 'user'):
-            user = request.user
-        if user and user.is_authenticated:
-            return Follow.objects.filter(user=user, author=obj.id).exists()
-        return False
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        state = get_user_state(self.context.get('request'))
+        return state.is_subscribed(obj.pk)
 
 
 class SubscribeSerializer(serializers.ModelSerializer):
@@ -96,10 +103,7 @@ class SubscribeSerializer(serializers.ModelSerializer):
     )
     is_subscribed = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.IntegerField(
-        source='author.recipes.count',
-        read_only=True
-    )
+    recipes_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Follow
@@ -113,30 +117,38 @@ class SubscribeSerializer(serializers.ModelSerializer):
                   'recipes_count',)
 
     def get_is_subscribed(self, obj):
-        return (
-            Follow.objects.filter(
-                user=obj.user,
-                author=obj.author
-            ).exists()
-        )
+        return True
 
     def get_recipes(self, obj):
-        request = self.context['request']
-        recipes_list_limit = None
+        if hasattr(obj, 'author_recipes'):
+            queryset = obj.author_recipes
+        else:
+            queryset = Recipe.objects.filter(
+                author=obj.author
+            )[:get_recipes_limit(self.context['request'])]
 
-        if 'recipes_limit' in request.query_params:
-            recipes_list_limit = int(
-                request.query_params.get('recipes_limit')
-            )
+        serializer = ShortRecipeSerializer(queryset,
+                                           many=True,
+                                           context=self.context)
 
-        queryset = Recipe.objects.filter(
-            author=obj.author
-        )[:recipes_list_limit]
+        return serializer.data
 
-        serializer = RecipeReadSerializer(queryset,
-                                          many=True,)
+    def get_recipes_count(self, obj):
+        return obj.author.recipes_count
 
-        return serializer.data
+
+class ShortRecipeSerializer(serializers.ModelSerializer):
+    image = Base64ImageField(
+        max_length=None,
+        use_url=True
+    )
+
+    class Meta:
+        model = Recipe
+        fields = ('id',
+                  'name',
+                  'image',
+                  'cooking_time')
 
 
 class RecipeReadSerializer(serializers.ModelSerializer):
@@ -156,6 +168,7 @@ class RecipeReadSerializer(serializers.ModelSerializer):
         max_length=None,
         use_url=True
     )
+    thumbnails = serializers.SerializerMethodField()
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
 
@@ -169,26 +182,32 @@ class RecipeReadSerializer(serializers.ModelSerializer):
                   'is_in_shopping_cart',
                   'name',
                   'image',
+                  'thumbnails',
                   'text',
                   'cooking_time')
 
-    def get_user(self):
+    def get_thumbnails(self, obj):
+        if not obj.image or not obj.thumbnails_ready:
+            return None
+        thumbnails = get_thumbnail_urls(obj.image.name)
         request = self.context.get('request')
-        if request and hasattr(request, 'user'):
-            return request.user
-        return None
+        if request is not None:
+            for urls in thumbnails.values():
+                for extension, url in urls.items():
+                    urls[extension] = request.build_absolute_uri(url)
+        return thumbnails
 
     def get_is_favorited(self, obj):
-        user = self.get_user()
-        if user and user.is_authenticated:
-            return obj.favourite.filter(user=user).exists()
-        return False
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
+        state = get_user_state(self.context.get('request'))
+        return state.is_favorited(obj.pk)
 
     def get_is_in_shopping_cart(self, obj):
-        user = self.get_user()
-        if user and user.is_authenticated:
-            return obj.basket_recipe.filter(user=user).exists()
-        return False
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
+        state = get_user_state(self.context.get('request'))
+        return state.is_in_shopping_cart(obj.pk)
 
 
 class RecipeWriteOrUpdateSerializer(serializers.ModelSerializer):
@@ -204,7 +223,7 @@ class RecipeWriteOrUpdateSerializer(serializers.ModelSerializer):
             queryset=Tag.objects.all(),
         ),
     )
-    image = Base64ImageField(
+    image = StreamingBase64ImageField(
         max_length=None,
         use_url=True
     )
@@ -232,19 +251,44 @@ class RecipeWriteOrUpdateSerializer(serializers.ModelSerializer):
 
         ingredient_list = []
         for ingredient in data['ingredients']:
-            if int(ingredient.get('amount')) < 1:
+            try:
+                amount = int(ingredient.get('amount'))
+                ingredient_id = int(ingredient.get('id'))
+            except (TypeError, ValueError):
+                raise serializers.ValidationError(
+                    'Id и количество ингредиента должны быть числами!'
+                )
+            if amount < 1:
                 raise serializers.ValidationError(
                     'Количество ингредиента должно быть больше 0!'
                 )
-            ingredient_list.append(ingredient.get('id'))
+            ingredient_list.append((ingredient_id, amount))
 
-        if len(ingredient_list) != len(set(ingredient_list)):
+        ingredient_ids = [pk for pk, _ in ingredient_list]
+        if len(ingredient_ids) != len(set(ingredient_ids)):
             raise serializers.ValidationError(
                 'Повторное указание ингредиента!'
             )
 
+        found = self.get_ingredients(ingredient_ids)
+        missing = [pk for pk in ingredient_ids if pk not in found]
+        if missing:
+            raise serializers.ValidationError({
+                'ingredients': 'Несуществующие ингредиенты: '
+                               f'{", ".join(map(str, missing))}!'
+            })
+
+        data['ingredients'] = [
+            {'ingredient': found[pk], 'amount': amount}
+            for pk, amount in ingredient_list
+        ]
         return data
 
+    def get_ingredients(self, ingredient_ids):
+        if catalogue.is_enabled():
+            return catalogue.get_catalogue().in_bulk(ingredient_ids)
+        return Ingredient.objects.in_bulk(ingredient_ids)
+
     def get_ingredients_and_tags(self, validated_data):
         try:
             return (
@@ -259,12 +303,9 @@ class RecipeWriteOrUpdateSerializer(serializers.ModelSerializer):
     def set_ingredients_and_tags(self, recipe, ingredients, tags):
         ingredients_insert = [
             IngredientRecipe(
-                ingredient=get_object_or_404(
-                    Ingredient,
-                    id=ingredient.get('id')
-                ),
+                ingredient=ingredient['ingredient'],
                 recipe=recipe,
-                amount=ingredient.get('amount')
+                amount=ingredient['amount']
             ) for ingredient in ingredients
         ]
         IngredientRecipe.objects.bulk_create(ingredients_insert)
@@ -272,22 +313,78 @@ class RecipeWriteOrUpdateSerializer(serializers.ModelSerializer):
         recipe.tags.set(tags)
         return recipe
 
+    def update_ingredients_and_tags(self, recipe, ingredients, tags):
+        current = {
+            ingredient_recipe.ingredient_id: ingredient_recipe
+            for ingredient_recipe in recipe.recipe_ingredient.all()
+        }
+        requested = {
+            ingredient['ingredient'].id: ingredient
+            for ingredient in ingredients
+        }
+
+        removed = current.keys() - requested.keys()
+        if removed:
+            IngredientRecipe.objects.filter(
+                recipe=recipe,
+                ingredient_id__in=removed
+            ).delete()
+
+        changed = []
+        for ingredient_id, ingredient_recipe in current.items():
+            ingredient = requested.get(ingredient_id)
+            if ingredient and ingredient_recipe.amount != ingredient['amount']:
+                ingredient_recipe.amount = ingredient['amount']
+                changed.append(ingredient_recipe)
+        if changed:
+            IngredientRecipe.objects.bulk_update(changed, ('amount',))
+
+        added = [
+            ingredient for ingredient_id, ingredient in requested.items()
+            if ingredient_id not in current
+        ]
+        if added:
+            self.set_ingredients_and_tags(recipe, added, tags)
+        else:
+            recipe.tags.set(tags)
+        return recipe
+
+    def image_saved(self, recipe, image):
+        # The storage has moved the temporary upload into place
+        image.close()
+        # Queued in the same transaction, so workers only see the job
+        # once the recipe is committed
+        schedule_thumbnails(recipe.image.name)
+
+    @transaction.atomic
     def create(self, validated_data):
         ingredients, tags = self.get_ingredients_and_tags(validated_data)
         recipe = Recipe.objects.create(**validated_data)
+        self.image_saved(recipe, validated_data['image'])
         return self.set_ingredients_and_tags(recipe, ingredients, tags)
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        instance.ingredients.clear()
-        instance.tags.clear()
-
         ingredients, tags = self.get_ingredients_and_tags(validated_data)
-        instance = self.set_ingredients_and_tags(
+        instance = self.update_ingredients_and_tags(
             instance,
             ingredients,
             tags,
         )
-        return super().update(instance, validated_data)
+        if 'image' in validated_data:
+            validated_data['thumbnails_ready'] = False
+        instance = super().update(instance, validated_data)
+        if 'image' in validated_data:
+            self.image_saved(instance, validated_data['image'])
+        return instance
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_BULK_RECIPES,
+    )
 
 
 class FavouriteSerializer(serializers.ModelSerializer):
@@ -307,3 +404,32 @@ class FavouriteSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 'Рецепт уже в избранном!')
         return data
+
+
+class JobSerializer(serializers.ModelSerializer):
+    url = serializers.SerializerMethodField()
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = ('id',
+                  'status',
+                  'created',
+                  'finished',
+                  'url',
+                  'download_url')
+
+    def get_absolute_url(self, view_name, obj):
+        # Not rest_framework.reverse, which would carry over the ?format
+        # of the request that queued the job
+        url = reverse(view_name, args=(obj.pk,))
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def get_url(self, obj):
+        return self.get_absolute_url('jobs-detail', obj)
+
+    def get_download_url(self, obj):
+        if obj.status != Job.DONE or not obj.result:
+            return None
+        return self.get_absolute_url('jobs-download', obj)
@@ -0,0 +1,184 @@
+"""
+Denormalized read model for the recipe feed.
+
+Everything in a recipe representation except ``is_favorited``,
+``is_in_shopping_cart`` and ``author.is_subscribed`` is the same for
+every reader, so it is serialized once and stored as JSON in
+:class:`~recipes.models.RecipeSnapshot`. Writes only delete the stale
+snapshots, once committed; the next read that needs one rebuilds it from
+the primary, and the feed is assembled from the stored fragments with
+the per-user flags overlaid.
+
+A rebuild can read rows just before a write commits and store them just
+after that write's delete ran. Every delete therefore bumps a version
+first, and a rebuild that sees the version change while it ran removes
+what it stored.
+"""
+import json
+
+from django.contrib.auth import get_user_model
+from django.db import router, transaction
+from django.db.models import Prefetch
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+from rest_framework import serializers
+
+from core import versions
+from recipes.models import (Ingredient, IngredientRecipe, Recipe,
+                            RecipeSnapshot, Tag)
+
+from .serializers import RecipeReadSerializer
+from .user_state import get_user_state
+
+User = get_user_model()
+
+VERSION_CACHE_KEY = 'recipe-snapshots-version'
+
+
+def build_snapshots(recipe_ids):
+    """Serialize and store snapshots of ``recipe_ids``, return them as a
+    dict of JSON strings by recipe id."""
+    version = versions.get_version(VERSION_CACHE_KEY)
+    # A lagging replica would be stored for good
+    using = router.db_for_write(RecipeSnapshot)
+    recipes = Recipe.objects.using(using).filter(
+        pk__in=recipe_ids
+    ).select_related(
+        'author'
+    ).prefetch_related(
+        Prefetch('tags'),
+        Prefetch(
+            'recipe_ingredient',
+            queryset=IngredientRecipe.objects.select_related('ingredient')
+        ),
+    )
+    # Without a request the serializer leaves the per-user flags False
+    # and the image and thumbnail URLs relative
+    snapshots = {
+        data['id']: json.dumps(data, ensure_ascii=False)
+        for data in RecipeReadSerializer(recipes, many=True).data
+    }
+    stored = RecipeSnapshot.objects.using(using)
+    stored.bulk_create(
+        [RecipeSnapshot(recipe_id=recipe_id, data=data)
+         for recipe_id, data in snapshots.items()],
+        ignore_conflicts=True,
+    )
+    if versions.get_version(VERSION_CACHE_KEY) != version:
+        # A write committed meanwhile and may predate what was read
+        stored.filter(recipe_id__in=snapshots).delete()
+    return snapshots
+
+
+def get_snapshots(recipe_ids):
+    """Return parsed snapshots of ``recipe_ids`` by recipe id, building
+    the missing ones."""
+    snapshots = dict(RecipeSnapshot.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list('recipe_id', 'data'))
+    missing = set(recipe_ids) - snapshots.keys()
+    if missing:
+        snapshots.update(build_snapshots(missing))
+    return {
+        recipe_id: json.loads(data)
+        for recipe_id, data in snapshots.items()
+    }
+
+
+class RecipeSnapshotListSerializer(serializers.ListSerializer):
+
+    def to_representation(self, data):
+        recipes = list(data)
+        snapshots = get_snapshots([recipe.pk for recipe in recipes])
+        state = get_user_state(self.context.get('request'))
+        return [
+            self.child.overlay(snapshots[recipe.pk], state)
+            for recipe in recipes
+        ]
+
+
+class RecipeSnapshotSerializer(serializers.BaseSerializer):
+    """Read-only recipe representation built from its snapshot.
+
+    The output is the same as :class:`RecipeReadSerializer`; the
+    per-user flags come from the reader's
+    :class:`~api.user_state.UserState`.
+    """
+
+    class Meta:
+        list_serializer_class = RecipeSnapshotListSerializer
+
+    def overlay(self, data, state):
+        data['is_favorited'] = state.is_favorited(data['id'])
+        data['is_in_shopping_cart'] = state.is_in_shopping_cart(data['id'])
+        data['author']['is_subscribed'] = state.is_subscribed(
+            data['author']['id']
+        )
+        request = self.context.get('request')
+        if request is not None and data['image']:
+            data['image'] = request.build_absolute_uri(data['image'])
+            for urls in (data['thumbnails'] or {}).values():
+                for extension, url in urls.items():
+                    urls[extension] = request.build_absolute_uri(url)
+        return data
+
+    def to_representation(self, instance):
+        return self.overlay(
+            get_snapshots([instance.pk])[instance.pk],
+            get_user_state(self.context.get('request')),
+        )
+
+
+def delete_snapshots(**lookup):
+    def delete():
+        versions.bump_version(VERSION_CACHE_KEY)
+        RecipeSnapshot.objects.filter(**lookup).delete()
+    transaction.on_commit(delete)
+
+
+def get_recipe_ids(**lookup):
+    # For lookups that no longer match once the transaction commits
+    return list(Recipe.objects.filter(**lookup).values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Recipe)
+def invalidate_recipe(instance, **kwargs):
+    delete_snapshots(recipe_id=instance.pk)
+
+
+@receiver((post_save, post_delete), sender=IngredientRecipe)
+def invalidate_recipe_ingredients(instance, **kwargs):
+    delete_snapshots(recipe_id=instance.recipe_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_tags(instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith('post_'):
+            delete_snapshots(recipe_id=instance.pk)
+    elif action == 'pre_clear':
+        delete_snapshots(recipe_id__in=get_recipe_ids(tags=instance))
+    elif action.startswith('post_') and pk_set:
+        delete_snapshots(recipe_id__in=list(pk_set))
+
+
+@receiver(post_save, sender=Tag)
+def invalidate_tag(instance, **kwargs):
+    delete_snapshots(recipe__tags=instance.pk)
+
+
+@receiver(pre_delete, sender=Tag)
+def invalidate_deleted_tag(instance, **kwargs):
+    delete_snapshots(recipe_id__in=get_recipe_ids(tags=instance))
+
+
+@receiver(post_save, sender=Ingredient)
+def invalidate_ingredient(instance, **kwargs):
+    delete_snapshots(recipe__recipe_ingredient__ingredient=instance.pk)
+
+
+@receiver(post_save, sender=User)
+def invalidate_author(instance, update_fields=None, **kwargs):
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        delete_snapshots(recipe__author=instance.pk)
@@ -0,0 +1,165 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from recipes.models import (FavouriteRecipe, Follow, Ingredient,
+                            IngredientRecipe, Recipe, Tag)
+
+User = get_user_model()
+
+RECIPES_URL = '/api/recipes/'
+FULL_PAGE_URL = f'{RECIPES_URL}?limit=100'
+
+
+class QueryCountTestCase(APITestCase):
+    """Pins the number of queries of the hot endpoints, so an N+1 or a
+    lost cache shows up as a failing test."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(
+                email=f'user{index}@example.com',
+                username=f'user{index}',
+                first_name='Имя',
+                last_name='Фамилия',
+                password='password',
+            )
+            for index in range(3)
+        ]
+        cls.user = cls.users[0]
+        cls.token = Token.objects.create(user=cls.user)
+        breakfast = Tag.objects.create(
+            name='Завтрак', color='#E26C2D', slug='breakfast'
+        )
+        lunch = Tag.objects.create(
+            name='Обед', color='#49B64E', slug='lunch'
+        )
+        salt = Ingredient.objects.create(name='соль', measurement_unit='г')
+        # More recipes than the largest page holds
+        cls.recipes = []
+        for index in range(104):
+            recipe = Recipe.objects.create(
+                author=cls.users[index % 3],
+                name=f'Рецепт {index}',
+                image='recipes/image.png',
+                text='Описание',
+                cooking_time=5,
+            )
+            recipe.tags.set([breakfast] if index % 2 else [breakfast, lunch])
+            IngredientRecipe.objects.create(
+                recipe=recipe, ingredient=salt, amount=3
+            )
+            cls.recipes.append(recipe)
+        FavouriteRecipe.objects.create(user=cls.user, recipe=cls.recipes[1])
+        Follow.objects.create(user=cls.user, author=cls.users[1])
+
+    def setUp(self):
+        # Cached pages, counts and versions would carry over between tests
+        cache.clear()
+
+    def authenticate(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def get_with_num_queries(self, number, url):
+        with self.assertNumQueries(number):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+
+class RecipeListQueriesTest(QueryCountTestCase):
+    """A page of 6 and a page of 100 take the same queries."""
+
+    def assert_feed_queries(self, url, number, cached_number, page_size):
+        response = self.get_with_num_queries(number, url)
+        self.assertEqual(len(response.json()['results']), page_size)
+        self.get_with_num_queries(cached_number, url)
+
+    def test_anonymous(self):
+        # The second time it is served from the response cache
+        self.assert_feed_queries(RECIPES_URL, 7, 0, 6)
+
+    def test_anonymous_full_page(self):
+        self.assert_feed_queries(FULL_PAGE_URL, 7, 0, 100)
+
+    def test_anonymous_filtered_by_tags(self):
+        url = f'{RECIPES_URL}?tags=lunch'
+        response = self.get_with_num_queries(9, url)
+        self.assertEqual(response.json()['count'], 52)
+        self.get_with_num_queries(0, url)
+
+    def test_authenticated(self):
+        self.authenticate()
+        self.assert_feed_queries(RECIPES_URL, 11, 3, 6)
+
+    def test_authenticated_full_page(self):
+        self.authenticate()
+        self.assert_feed_queries(FULL_PAGE_URL, 11, 3, 100)
+
+
+class UserQueriesTest(QueryCountTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # djoser lists every user only to staff
+        cls.staff = User.objects.create_user(
+            email='staff@example.com',
+            username='staff',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='password',
+            is_staff=True,
+        )
+        cls.staff_token = Token.objects.create(user=cls.staff)
+        authors = [
+            User.objects.create_user(
+                email=f'author{index}@example.com',
+                username=f'author{index}',
+                first_name='Имя',
+                last_name='Фамилия',
+                password='password',
+            )
+            for index in range(8)
+        ]
+        Follow.objects.create(user=cls.staff, author=cls.users[1])
+        for index, author in enumerate(authors):
+            Follow.objects.create(user=author, author=authors[index - 1])
+            if index % 2:
+                Follow.objects.create(user=cls.staff, author=author)
+
+    def test_list_staff(self):
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {self.staff_token.key}'
+        )
+        followed = set(
+            self.staff.follower.values_list('author_id', flat=True)
+        )
+        for limit in (3, 10):
+            with self.subTest(limit=limit):
+                cache.clear()
+                url = f'/api/users/?limit={limit}'
+                response = self.get_with_num_queries(3, url)
+                results = response.json()['results']
+                self.assertEqual(len(results), limit)
+                for user in results:
+                    self.assertEqual(user['is_subscribed'],
+                                     user['id'] in followed)
+                # The token is looked up once, then cached
+                self.get_with_num_queries(2, url)
+
+    def test_detail_anonymous(self):
+        url = f'/api/users/{self.users[1].id}/'
+        response = self.get_with_num_queries(1, url)
+        self.assertFalse(response.json()['is_subscribed'])
+        self.get_with_num_queries(0, url)
+
+    def test_detail_authenticated(self):
+        self.authenticate()
+        url = f'/api/users/{self.users[1].id}/'
+        response = self.get_with_num_queries(2, url)
+        self.assertTrue(response.json()['is_subscribed'])
+        self.get_with_num_queries(1, url)
@@ -0,0 +1,69 @@
+"""
+Favourite, basket and subscription state of the requesting user.
+
+Serializers answer "did I favourite this / is it in my basket / do I
+follow this author" from three id sets instead of a query per object.
+The sets are loaded once per request in at most three queries and
+cached across requests under the user's state version (see
+``api.caching``), which every favourite, basket and subscription change
+bumps.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from core import versions
+from core.models import BasketUser
+from recipes.models import FavouriteRecipe, Follow
+
+from .caching import get_user_state_key
+
+
+class UserState:
+    __slots__ = ('favourite_ids', 'basket_ids', 'following_ids')
+
+    def __init__(self, favourite_ids=(), basket_ids=(), following_ids=()):
+        self.favourite_ids = frozenset(favourite_ids)
+        self.basket_ids = frozenset(basket_ids)
+        self.following_ids = frozenset(following_ids)
+
+    def is_favorited(self, recipe_id):
+        return recipe_id in self.favourite_ids
+
+    def is_in_shopping_cart(self, recipe_id):
+        return recipe_id in self.basket_ids
+
+    def is_subscribed(self, author_id):
+        return author_id in self.following_ids
+
+
+ANONYMOUS_STATE = UserState()
+
+
+def load_user_state(user_id):
+    return tuple(
+        tuple(queryset.values_list(field, flat=True))
+        for queryset, field in (
+            (FavouriteRecipe.objects.filter(user_id=user_id), 'recipe_id'),
+            (BasketUser.objects.filter(user_id=user_id), 'recipe_id'),
+            (Follow.objects.filter(user_id=user_id), 'author_id'),
+        )
+    )
+
+
+def get_user_state(request):
+    """Return the :class:`UserState` of ``request.user``, memoized on the
+    request."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return ANONYMOUS_STATE
+
+    state = getattr(request, '_user_state', None)
+    if state is None:
+        version = versions.get_version(get_user_state_key(user.pk))
+        cache_key = f'user-state-ids:{user.pk}:{version}'
+        ids = cache.get(cache_key)
+        if ids is None:
+            ids = load_user_state(user.pk)
+            cache.set(cache_key, ids, settings.USER_STATE_CACHE_TIMEOUT)
+        state = request._user_state = UserState(*ids)
+    return state
@@ -0,0 +1,43 @@
+from collections import defaultdict
+
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from recipes.models import Recipe
+
+
+def get_recipes_limit(request):
+    try:
+        return max(int(request.query_params['recipes_limit']), 0)
+    except (KeyError, ValueError):
+        return None
+
+
+def get_authors_recipes(author_ids, limit=None):
+    """Return ``{author_id: [recipe, ...]}`` with at most ``limit`` newest
+    recipes per author, fetched in a single query."""
+    queryset = Recipe.objects.filter(author_id__in=author_ids)
+
+    if limit is not None:
+        ranked = queryset.annotate(
+            recipe_position=Window(
+                expression=RowNumber(),
+                partition_by=[F('author_id')],
+                order_by=(F('pub_date').desc(), F('id').desc()),
+            )
+        ).values(
+            'id', 'author_id', 'name', 'image', 'cooking_time', 'pub_date',
+            'recipe_position',
+        ).order_by()
+        sql, params = ranked.query.sql_with_params()
+        queryset = Recipe.objects.raw(
+            f'SELECT * FROM ({sql}) ranked '
+            'WHERE ranked.recipe_position <= %s '
+            'ORDER BY ranked.author_id, ranked.recipe_position',
+            (*params, limit),
+        )
+
+    recipes = defaultdict(list)
+    for recipe in queryset:
+        recipes[recipe.author_id].append(recipe)
+    return recipes
@@ -1,48 +1,84 @@
+import os
+
 from django.contrib.auth import get_user_model
-from django.db.models import Sum
+from django.db import IntegrityError, transaction
+from django.db.models import BooleanField, Exists, OuterRef, Prefetch, Value
+from django.http import FileResponse, Http404
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 from rest_framework import mixins, viewsets
 from rest_framework.decorators import action
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.status import (HTTP_200_OK, HTTP_201_CREATED,
-                                   HTTP_204_NO_CONTENT, HTTP_400_BAD_REQUEST)
-
-from core.models import BasketUser
-from core.utils import get_shopping_list_pdf
+                                   HTTP_202_ACCEPTED, HTTP_204_NO_CONTENT,
+                                   HTTP_400_BAD_REQUEST)
+
+from core.counters import batched_counters, change_counters
+from core.exporters import EXPORTERS, get_basket_ingredients
+from core.jobs import enqueue
+from core.models import BasketUser, Job
+from recipes import catalogue
 from recipes.models import (FavouriteRecipe, Follow, Ingredient,
                             IngredientRecipe, Recipe, Tag)
+from recipes.search import MAX_SEARCH_LIMIT, SEARCH_LIMIT, search_ingredients
 
+from .caching import (INGREDIENTS, RECIPES, TAGS, USERS, CachedReadMixin,
+                      bump_user_state)
 from .filters import RecipeFilter
+from .pagination import LimitPageNumberPagination, RecipePagination
 from .permissions import AuthorOrReadOnly
+from .renderers import SHOPPING_LIST_RENDERERS
 from .serializers import (FoodUserSerializer, IngredientSerializer,
+                          JobSerializer, RecipeIdsSerializer,
                           RecipeReadSerializer, RecipeWriteOrUpdateSerializer,
                           SubscribeSerializer, TagSerializer)
+from .snapshots import RecipeSnapshotSerializer
+from .utils import get_authors_recipes, get_recipes_limit
 
 User = get_user_model()
 
 
-class RecipeViewSet(mixins.CreateModelMixin,
+class RecipeViewSet(CachedReadMixin,
+                    mixins.CreateModelMixin,
                     mixins.ListModelMixin,
                     mixins.RetrieveModelMixin,
                     mixins.UpdateModelMixin,
                     mixins.DestroyModelMixin,
                     viewsets.GenericViewSet):
-    queryset = Recipe.objects.all()
+    cache_resources = (RECIPES,)
     permission_classes = (
         AuthorOrReadOnly,
     )
-    pagination_class = PageNumberPagination
+    pagination_class = RecipePagination
     filter_backends = (DjangoFilterBackend,)
     filter_class = RecipeFilter
 
+    def get_queryset(self):
+        # The per-user flags come from api.user_state, not annotations
+        if self.action == 'list':
+            # The feed is rendered from snapshots, which hold the author,
+            # tags and ingredients already
+            return Recipe.objects.all()
+        return Recipe.objects.select_related(
+            'author'
+        ).prefetch_related(
+            Prefetch('tags'),
+            Prefetch(
+                'recipe_ingredient',
+                queryset=IngredientRecipe.objects.select_related(
+                    'ingredient'
+                )
+            ),
+        )
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
     def get_serializer_class(self):
+        if self.action == 'list':
+            return RecipeSnapshotSerializer
         if self.request.method == 'GET':
             return RecipeReadSerializer
         return RecipeWriteOrUpdateSerializer
@@ -69,6 +105,9 @@ class RecipeViewSet(mixins.CreateModelMixin,
         serializer.is_valid(raise_exception=True)
         self.perform_update(serializer)
 
+        if getattr(instance, '_prefetched_objects_cache', None):
+            instance._prefetched_objects_cache = {}
+
         serializer = RecipeReadSerializer(
             instance=serializer.instance,
             context={'request': self.request},
@@ -112,6 +151,79 @@ class RecipeViewSet(mixins.CreateModelMixin,
             status=HTTP_400_BAD_REQUEST
         )
 
+    def get_recipe_ids(self, request):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return set(serializer.validated_data['recipes'])
+
+    def get_added_flags(self, model, user, ids):
+        """Map each existing recipe of ``ids`` to whether ``user`` has
+        already added it, in one query."""
+        return dict(Recipe.objects.filter(pk__in=ids).annotate(
+            added=Exists(model.objects.filter(
+                user=user,
+                recipe=OuterRef('pk')
+            ))
+        ).values_list('pk', 'added'))
+
+    def bulk_add_recipes(self, request, model):
+        user = request.user
+        ids = self.get_recipe_ids(request)
+
+        with transaction.atomic():
+            new_ids = None
+            while True:
+                recipes = self.get_added_flags(model, user, ids)
+                missing = ids - recipes.keys()
+                if missing:
+                    return Response({
+                        'errors': 'Несуществующие рецепты: '
+                                  f'{", ".join(map(str, sorted(missing)))}!'},
+                        status=HTTP_400_BAD_REQUEST
+                    )
+                previous_ids = new_ids
+                new_ids = sorted(recipe_id for recipe_id, added
+                                 in recipes.items() if not added)
+                try:
+                    with transaction.atomic():
+                        model.objects.bulk_create(
+                            model(user=user, recipe_id=recipe_id)
+                            for recipe_id in new_ids
+                        )
+                    break
+                except IntegrityError:
+                    # A concurrent request added some of them; look again
+                    # unless that changed nothing
+                    if new_ids == previous_ids:
+                        raise
+            # bulk_create sends no signals, so counters and the user
+            # state version are updated here, for the rows it inserted
+            change_counters(
+                model,
+                [model(user=user, recipe_id=recipe_id)
+                 for recipe_id in new_ids],
+                1,
+            )
+
+        if new_ids:
+            bump_user_state(user.pk)
+        return Response({'added': new_ids}, status=HTTP_201_CREATED)
+
+    def bulk_del_recipes(self, request, model):
+        user = request.user
+        ids = self.get_recipe_ids(request)
+
+        # The per-row delete signals update the user state; their counter
+        # changes are applied together, one UPDATE per counter
+        with transaction.atomic(), batched_counters():
+            removed = sorted(model.objects.select_for_update().filter(
+                user=user,
+                recipe_id__in=ids
+            ).values_list('recipe_id', flat=True))
+            model.objects.filter(user=user, recipe_id__in=removed).delete()
+
+        return Response({'removed': removed}, status=HTTP_200_OK)
+
     @action(
         detail=True,
         methods=('post', 'delete'),
@@ -142,8 +254,33 @@ class RecipeViewSet(mixins.CreateModelMixin,
 
     @action(
         detail=False,
-        methods=('get',),
+        methods=('post', 'delete'),
+        permission_classes=(IsAuthenticated,),
+        url_path='favorite',
+        url_name='favorite-bulk',
+    )
+    def bulk_favorite(self, request):
+        if request.method == 'POST':
+            return self.bulk_add_recipes(request, FavouriteRecipe)
+        return self.bulk_del_recipes(request, FavouriteRecipe)
+
+    @action(
+        detail=False,
+        methods=('post', 'delete'),
+        permission_classes=(IsAuthenticated,),
+        url_path='shopping_cart',
+        url_name='shopping_cart-bulk',
+    )
+    def bulk_shopping_cart(self, request):
+        if request.method == 'POST':
+            return self.bulk_add_recipes(request, BasketUser)
+        return self.bulk_del_recipes(request, BasketUser)
+
+    @action(
+        detail=False,
+        methods=('get', 'post'),
         permission_classes=(IsAuthenticated,),
+        renderer_classes=SHOPPING_LIST_RENDERERS,
         url_path='download_shopping_cart',
         url_name='download_shopping_cart',
     )
@@ -156,42 +293,113 @@ class RecipeViewSet(mixins.CreateModelMixin,
                 status=HTTP_400_BAD_REQUEST
             )
 
-        basket_ingredients = IngredientRecipe.objects.filter(
-            recipe__basket_recipe__user=user
-        ).values(
-            'ingredient__name',
-            'ingredient__measurement_unit'
-        ).annotate(amount=Sum('amount')).order_by('ingredient__name')
+        export_format = request.accepted_renderer.format
+        if request.method == 'POST':
+            job = enqueue(
+                'core.exporters.export_shopping_list',
+                user=user,
+                user_id=user.pk,
+                export_format=export_format,
+            )
+            serializer = JobSerializer(job, context={'request': request})
+            return Response(
+                serializer.data,
+                status=HTTP_202_ACCEPTED,
+                headers={'Location': serializer.data['url']},
+            )
+
+        exporter = EXPORTERS[export_format]
+        return exporter.get_response(get_basket_ingredients(user))
+
+
+class JobViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    serializer_class = JobSerializer
+    permission_classes = (IsAuthenticated,)
 
-        return get_shopping_list_pdf(basket_ingredients)
+    def get_queryset(self):
+        return Job.objects.filter(user=self.request.user)
+
+    @action(detail=True, methods=('get',))
+    def download(self, request, pk=None):
+        job = self.get_object()
+        if job.status != Job.DONE or not job.result:
+            raise Http404
+        return FileResponse(
+            job.result.open('rb'),
+            as_attachment=True,
+            filename=os.path.basename(job.result.name),
+        )
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(CachedReadMixin, viewsets.ReadOnlyModelViewSet):
+    cache_resources = (TAGS,)
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(CachedReadMixin, viewsets.ReadOnlyModelViewSet):
+    cache_resources = (INGREDIENTS,)
+    queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     pagination_class = None
 
-    def get_queryset(self):
-        queryset = Ingredient.objects.all()
+    def get_limit(self, default):
+        try:
+            limit = int(self.request.query_params['limit'])
+        except (KeyError, ValueError):
+            return default
+        return min(max(limit, 0), MAX_SEARCH_LIMIT)
+
+    def get_object(self):
+        if not catalogue.is_enabled():
+            return super().get_object()
+        try:
+            ingredient = catalogue.get_catalogue().get(int(self.kwargs['pk']))
+        except ValueError:
+            ingredient = None
+        if ingredient is None:
+            raise Http404
+        return ingredient
+
+    def filter_queryset(self, queryset):
+        if self.action != 'list':
+            return queryset
+
         name = self.request.query_params.get('name')
-        if name is not None:
-            return queryset.filter(name__iregex=f'^{name}')
-        return queryset
+        if name:
+            return search_ingredients(name, self.get_limit(SEARCH_LIMIT))
+        if catalogue.is_enabled():
+            return catalogue.get_catalogue().all(self.get_limit(None))
+        return queryset[:self.get_limit(None)]
 
 
-class SpecialUserViewSet(UserViewSet):
-    queryset = User.objects.all().prefetch_related('recipes')
+class SpecialUserViewSet(CachedReadMixin, UserViewSet):
+    cache_resources = (USERS, RECIPES)
+    queryset = User.objects.order_by('id')
     serializer_class = FoodUserSerializer
+    pagination_class = LimitPageNumberPagination
     lookup_field = 'pk'
     lookup_value_regex = '[0-9]'
 
     http_method_names = ('get', 'post', 'delete')
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+
+        if user.is_authenticated:
+            return queryset.annotate(
+                is_subscribed=Exists(Follow.objects.filter(
+                    user=user,
+                    author=OuterRef('pk')
+                ))
+            )
+
+        return queryset.annotate(
+            is_subscribed=Value(False, output_field=BooleanField())
+        )
+
     def add_subscribe(self, request, pk=None):
         user = request.user
         author = get_object_or_404(User, pk=pk)
@@ -232,9 +440,22 @@ class SpecialUserViewSet(UserViewSet):
         url_name='subscriptions',
     )
     def get_subscriptions(self, request):
+        return self.get_cached_response(self.list_subscriptions, request)
+
+    def list_subscriptions(self, request):
         user = request.user
-        queryset = Follow.objects.filter(user=user)
+        queryset = Follow.objects.filter(
+            user=user
+        ).select_related('author').order_by('id')
         pages = self.paginate_queryset(queryset)
+
+        authors_recipes = get_authors_recipes(
+            [follow.author_id for follow in pages],
+            get_recipes_limit(request),
+        )
+        for follow in pages:
+            follow.author_recipes = authors_recipes[follow.author_id]
+
         serializer = SubscribeSerializer(
             pages,
             many=True,
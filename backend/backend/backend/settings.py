@@ -74,6 +74,20 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# DB_CONN_MAX_AGE keeps connections open between requests, seconds
+# (0 closes them after each request, empty keeps them forever).
+# DB_HEALTH_CHECKS pings a kept PostgreSQL connection the first time a
+# request uses it (core.backends.postgresql). DB_POOL_SIZE > 0 switches
+# PostgreSQL to a per-process pool of that many connections for threaded
+# workers; use it with DB_CONN_MAX_AGE=0 so connections go back to the
+# pool after each request. A thread waits up to DB_POOL_TIMEOUT seconds
+# for a pooled connection before the query fails.
+
+DB_CONN_MAX_AGE = os.environ.get('DB_CONN_MAX_AGE', '60')
+DB_HEALTH_CHECKS = bool(int(os.environ.get('DB_HEALTH_CHECKS', 1)))
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 0))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 5))
+
 DATABASES = {
     'default': {
         'ENGINE': os.environ.get('DB_ENGINE'),
@@ -82,6 +96,69 @@ DATABASES = {
         'PASSWORD': os.environ.get('POSTGRES_PASSWORD'),
         'HOST': os.environ.get('DB_HOST'),
         'PORT': os.environ.get('DB_PORT'),
+        'CONN_MAX_AGE': int(DB_CONN_MAX_AGE) if DB_CONN_MAX_AGE else None,
+    }
+}
+
+if DATABASES['default']['ENGINE'] in (
+    'django.db.backends.postgresql',
+    'django.db.backends.postgresql_psycopg2',
+):
+    if DB_POOL_SIZE:
+        DATABASES['default']['ENGINE'] = 'core.backends.postgresql_pool'
+    elif DB_HEALTH_CHECKS:
+        DATABASES['default']['ENGINE'] = 'core.backends.postgresql'
+
+# DB_REPLICAS lists read replicas of the default database, comma
+# separated: host[:port] for PostgreSQL, file paths for SQLite. Safe
+# requests read from them (core.replicas); a client that wrote stays on
+# the primary for DB_REPLICA_STICKY_SECONDS.
+
+DB_REPLICA_STICKY_SECONDS = int(
+    os.environ.get('DB_REPLICA_STICKY_SECONDS', 10)
+)
+
+for index, replica in enumerate(
+    filter(None, os.environ.get('DB_REPLICAS', '').split(',')), start=1
+):
+    replica_settings = dict(DATABASES['default'], TEST={'MIRROR': 'default'})
+    if replica_settings['ENGINE'] == 'django.db.backends.sqlite3':
+        replica_settings['NAME'] = replica
+    else:
+        host, _, port = replica.partition(':')
+        replica_settings['HOST'] = host
+        replica_settings['PORT'] = port or replica_settings['PORT']
+    DATABASES[f'replica{index}'] = replica_settings
+
+if len(DATABASES) > 1:
+    DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+    MIDDLEWARE.insert(1, 'core.replicas.ReplicaMiddleware')
+
+# wait_for_db gives up after DB_WAIT_TIMEOUT seconds
+DB_WAIT_TIMEOUT = int(os.environ.get('DB_WAIT_TIMEOUT', 60))
+
+# Cache
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+# CACHE_BACKEND is redis (shared, the default), file or locmem. Version
+# tokens only reach every worker and the job worker through a shared
+# backend, so locmem (per process) is for development only and is the
+# default with DEBUG. CACHE_LOCATION overrides the backend's location.
+
+CACHE_BACKENDS = {
+    'redis': ('django_redis.cache.RedisCache', 'redis://redis:6379/1'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache',
+             '/var/tmp/foodgram-cache'),
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'foodgram'),
+}
+
+CACHE_BACKEND, CACHE_LOCATION = CACHE_BACKENDS[
+    os.environ.get('CACHE_BACKEND', 'locmem' if DEBUG else 'redis')
+]
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.environ.get('CACHE_LOCATION', CACHE_LOCATION),
     }
 }
 
@@ -135,7 +212,7 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ),
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     'PAGE_SIZE': 6,
@@ -151,3 +228,44 @@ DJOSER = {
         'user_list': ('rest_framework.permissions.AllowAny',)
     }
 }
+
+# Rendered shopping lists are cached by content hash, seconds
+SHOPPING_LIST_CACHE_TIMEOUT = int(
+    os.environ.get('SHOPPING_LIST_CACHE_TIMEOUT', 60 * 60)
+)
+
+# Serve ingredient listing, search and lookups from the in-process
+# catalogue (recipes.catalogue) instead of the database
+INGREDIENT_CATALOGUE = bool(int(os.environ.get('INGREDIENT_CATALOGUE', 1)))
+
+# Totals of keyset (cursor) pages are cached, seconds
+PAGINATION_COUNT_CACHE_TIMEOUT = int(
+    os.environ.get('PAGINATION_COUNT_CACHE_TIMEOUT', 60)
+)
+
+# Anonymous API responses are cached per resource generation, seconds
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 60 * 10))
+
+# Background jobs (core.jobs): seconds before a running job is considered
+# abandoned, attempts before it fails, seconds before the first retry
+# (doubled for each further one), seconds results are kept
+JOB_TIMEOUT = int(os.environ.get('JOB_TIMEOUT', 60 * 10))
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 3))
+JOB_RETRY_DELAY = int(os.environ.get('JOB_RETRY_DELAY', 30))
+JOB_RESULT_TIMEOUT = int(os.environ.get('JOB_RESULT_TIMEOUT', 60 * 60 * 24))
+
+# Favourite, basket and subscription id sets of a user (api.user_state)
+# are cached across requests until they change, seconds; 0 disables
+USER_STATE_CACHE_TIMEOUT = int(
+    os.environ.get('USER_STATE_CACHE_TIMEOUT', 60 * 60)
+)
+
+# Token -> user snapshots kept by api.authentication: entries per process,
+# seconds, and whether the shared cache is used as a second tier
+AUTH_TOKEN_CACHE_SIZE = int(os.environ.get('AUTH_TOKEN_CACHE_SIZE', 1024))
+AUTH_TOKEN_CACHE_TIMEOUT = int(
+    os.environ.get('AUTH_TOKEN_CACHE_TIMEOUT', 60 * 5)
+)
+AUTH_TOKEN_SHARED_CACHE = bool(
+    int(os.environ.get('AUTH_TOKEN_SHARED_CACHE', 0))
+)
@@ -1,13 +1,29 @@
 from django.contrib import admin
 
-from .models import BasketUser
+from .admin_filters import input_filter
+from .models import BasketUser, Job
 
 
 class BasketAdmin(admin.ModelAdmin):
     list_display = ('user', 'recipes_count')
-    list_filter = ('user', )
+    list_select_related = ('user',)
+    autocomplete_fields = ('user', 'recipe')
+    list_filter = (input_filter('user__username', 'покупателю'),)
     search_fields = ('user__username',)
     ordering = ('user',)
+    show_full_result_count = False
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('task', 'user', 'status', 'attempts', 'created',
+                    'finished')
+    list_select_related = ('user',)
+    list_filter = ('status', 'task')
+    readonly_fields = ('task', 'kwargs', 'user', 'attempts', 'result',
+                       'error', 'created', 'run_after', 'started',
+                       'finished')
+    show_full_result_count = False
 
 
 admin.site.register(BasketUser, BasketAdmin)
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,37 @@
+from django.contrib import admin
+
+
+class InputFilter(admin.SimpleListFilter):
+    """Free text changelist filter.
+
+    Unlike field list filters it doesn't load every distinct value of the
+    column to render its choices; the entered value is matched with
+    ``lookup``.
+    """
+    template = 'admin/input_filter.html'
+    lookup = None
+
+    def lookups(self, request, model_admin):
+        return ((None, None),)
+
+    def choices(self, changelist):
+        all_choice = next(super().choices(changelist))
+        all_choice['query_parts'] = (
+            (name, value)
+            for name, value in changelist.get_filters_params().items()
+            if name != self.parameter_name
+        )
+        yield all_choice
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{self.lookup: self.value()})
+        return queryset
+
+
+def input_filter(field, title, lookup='iexact'):
+    return type(f'{field.title()}InputFilter', (InputFilter,), {
+        'title': title,
+        'parameter_name': field,
+        'lookup': f'{field}__{lookup}',
+    })
@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from . import counters  # noqa: F401
+        from .pdf import register_fonts
+        register_fonts()
@@ -0,0 +1,38 @@
+"""
+PostgreSQL backend that health-checks persistent connections.
+
+With ``CONN_MAX_AGE`` a connection outlives the request that opened it,
+and Django only notices a connection the server has dropped when a
+query fails. This backend pings a kept connection with ``SELECT 1`` the
+first time a request uses it, and reconnects if the ping fails. A
+request that doesn't touch the database costs nothing; Django 2.2 has
+no ``CONN_HEALTH_CHECKS`` to do this for us.
+"""
+from django.conf import settings
+from django.db.backends.postgresql import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    health_check_done = False
+
+    def connect(self):
+        super().connect()
+        # A connection that was just opened needs no ping
+        self.health_check_done = True
+
+    def close_if_unusable_or_obsolete(self):
+        # Called when a request starts and finishes
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def ensure_connection(self):
+        if (
+            settings.DB_HEALTH_CHECKS
+            and not self.health_check_done
+            and self.connection is not None
+            and not self.in_atomic_block
+        ):
+            self.health_check_done = True
+            if not self.is_usable():
+                self.close()
+        super().ensure_connection()
@@ -0,0 +1,107 @@
+"""
+PostgreSQL backend that borrows connections from a per-process pool.
+
+Closing a connection hands it back to the pool instead of disconnecting,
+so threaded uWSGI workers reuse up to ``DB_POOL_SIZE`` connections even
+with ``CONN_MAX_AGE = 0``. A thread that finds every connection borrowed
+waits up to ``DB_POOL_TIMEOUT`` seconds for one to come back. Returned
+connections are reset first, and borrowed ones are checked with
+``SELECT 1`` when ``DB_HEALTH_CHECKS`` is on and replaced if the server
+dropped them.
+"""
+import threading
+
+from django.conf import settings
+from django.db.backends.postgresql.base import Database
+from psycopg2 import pool
+
+from ..postgresql import base
+
+_pools = {}
+_lock = threading.Lock()
+
+
+class BlockingConnectionPool(pool.ThreadedConnectionPool):
+    """Wait for a free connection instead of raising ``PoolError``."""
+
+    def __init__(self, maxconn, *args, **kwargs):
+        # psycopg2 closes returned connections beyond minconn instead of
+        # keeping them idle, so both are the pool size; the connections
+        # are opened together on first use
+        super().__init__(maxconn, maxconn, *args, **kwargs)
+        self.slots = threading.BoundedSemaphore(maxconn)
+
+    def getconn(self, key=None):
+        if not self.slots.acquire(timeout=settings.DB_POOL_TIMEOUT):
+            raise Database.OperationalError(
+                f'No pooled connection freed up in '
+                f'{settings.DB_POOL_TIMEOUT:g} seconds'
+            )
+        try:
+            return super().getconn(key)
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def putconn(self, conn, key=None, close=False):
+        try:
+            super().putconn(conn, key, close)
+        finally:
+            self.slots.release()
+
+
+def get_pool(alias, conn_params):
+    with _lock:
+        if alias not in _pools:
+            _pools[alias] = BlockingConnectionPool(
+                settings.DB_POOL_SIZE, **conn_params
+            )
+        return _pools[alias]
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def borrow_connection(self, conn_params):
+        connection_pool = get_pool(self.alias, conn_params)
+        # A dropped connection is only found by using it; try as many
+        # times as the pool can hold idle connections
+        for _ in range(settings.DB_POOL_SIZE):
+            connection = connection_pool.getconn()
+            if not settings.DB_HEALTH_CHECKS:
+                return connection
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                connection.rollback()
+                return connection
+            except Database.Error:
+                connection_pool.putconn(connection, close=True)
+        return connection_pool.getconn()
+
+    def get_new_connection(self, conn_params):
+        connection = self.borrow_connection(conn_params)
+
+        # The same as the parent, which connects without a pool
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        connection_pool = get_pool(self.alias, None)
+        try:
+            # Roll back whatever the request left open or failed, and
+            # undo its SET commands, before another thread borrows it
+            self.connection.reset()
+        except Database.Error:
+            connection_pool.putconn(self.connection, close=True)
+        else:
+            connection_pool.putconn(self.connection)
@@ -0,0 +1,143 @@
+"""
+Denormalized per-user and per-recipe counters.
+
+``FoodUser`` keeps ``recipes_count``, ``favourites_count``,
+``basket_count``, ``followers_count`` and ``following_count`` and
+``Recipe`` keeps ``favourites_count``. Signal receivers below adjust
+them with ``F()`` updates whenever a recipe, favourite, basket entry or
+subscription is created or deleted; both models leave the counters out
+of plain saves (:class:`core.mixins.CounterFieldsMixin`), so an instance
+loaded earlier can't write stale values back over them. Bulk inserts
+send no signals, so code using ``bulk_create`` calls
+:func:`change_counters` itself; bulk deletes run inside
+:func:`batched_counters`, which turns the per-row changes into one
+UPDATE per counter. :func:`reconcile_counters` recomputes everything and
+fixes drift.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.models import FavouriteRecipe, Follow, Recipe
+
+from .models import BasketUser
+
+# model: ((counter owner model label, foreign key, counter field), ...)
+COUNTERS = {
+    'recipes.Recipe': (
+        (settings.AUTH_USER_MODEL, 'author', 'recipes_count'),
+    ),
+    'recipes.FavouriteRecipe': (
+        (settings.AUTH_USER_MODEL, 'user', 'favourites_count'),
+        ('recipes.Recipe', 'recipe', 'favourites_count'),
+    ),
+    'core.BasketUser': (
+        (settings.AUTH_USER_MODEL, 'user', 'basket_count'),
+    ),
+    'recipes.Follow': (
+        (settings.AUTH_USER_MODEL, 'author', 'followers_count'),
+        (settings.AUTH_USER_MODEL, 'user', 'following_count'),
+    ),
+}
+
+
+_batch = threading.local()
+
+
+def change_counters(model, instances, delta):
+    """Add ``delta`` to the counters that ``instances`` of ``model``
+    contribute to, one UPDATE per counter and distinct amount."""
+    for owner_label, field, counter in COUNTERS[model._meta.label]:
+        owner = global_apps.get_model(owner_label)
+        amounts = {}
+        for instance in instances:
+            owner_id = getattr(instance, f'{field}_id')
+            amounts[owner_id] = amounts.get(owner_id, 0) + delta
+        by_amount = {}
+        for owner_id, amount in amounts.items():
+            by_amount.setdefault(amount, []).append(owner_id)
+        for amount, owner_ids in by_amount.items():
+            owner.objects.filter(pk__in=owner_ids).update(
+                **{counter: F(counter) + amount}
+            )
+
+
+@contextmanager
+def batched_counters():
+    """Collect the counter changes signalled inside the block and apply
+    them together when it exits without an error."""
+    changes = _batch.changes = {}
+    try:
+        yield
+    finally:
+        _batch.changes = None
+    for (model, delta), instances in changes.items():
+        change_counters(model, instances, delta)
+
+
+def record_change(model, instance, delta):
+    changes = getattr(_batch, 'changes', None)
+    if changes is None:
+        change_counters(model, (instance,), delta)
+    else:
+        changes.setdefault((model, delta), []).append(instance)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=FavouriteRecipe)
+@receiver(post_save, sender=BasketUser)
+@receiver(post_save, sender=Follow)
+def increment_counters(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        record_change(sender, instance, 1)
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=FavouriteRecipe)
+@receiver(post_delete, sender=BasketUser)
+@receiver(post_delete, sender=Follow)
+def decrement_counters(sender, instance, **kwargs):
+    record_change(sender, instance, -1)
+
+
+def reconcile_counters(apps=global_apps):
+    """Recompute every counter from the source tables and return the
+    number of rows that had drifted."""
+    owners = {}
+    for model_label, counters in COUNTERS.items():
+        model = apps.get_model(model_label)
+        for owner_label, field, counter in counters:
+            owners.setdefault(owner_label, {})[counter] = Coalesce(
+                Subquery(
+                    model.objects.filter(
+                        **{field: OuterRef('pk')}
+                    ).order_by().values(field).annotate(
+                        total=Count('pk')
+                    ).values('total')
+                ),
+                0,
+            )
+
+    drifted = 0
+    for owner_label, expressions in owners.items():
+        owner = apps.get_model(owner_label)
+        actual = {f'actual_{counter}': expression
+                  for counter, expression in expressions.items()}
+        drift = Q()
+        for counter in expressions:
+            drift |= ~Q(**{counter: F(f'actual_{counter}')})
+        owner_ids = list(
+            owner.objects.annotate(**actual).filter(drift).values_list(
+                'pk', flat=True
+            )
+        )
+        if owner_ids:
+            owner.objects.filter(pk__in=owner_ids).update(**expressions)
+        drifted += len(owner_ids)
+    return drifted
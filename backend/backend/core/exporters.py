@@ -0,0 +1,131 @@
+import csv
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.db.models import Sum
+from django.http import StreamingHttpResponse
+
+from recipes.models import IngredientRecipe
+
+from .utils import get_shopping_list_pdf, get_shopping_list_pdf_content
+
+User = get_user_model()
+
+
+def get_basket_ingredients(user):
+    """Ingredients of the recipes in the basket of ``user``, summed and
+    ordered by name."""
+    return IngredientRecipe.objects.filter(
+        recipe__basket_recipe__user=user
+    ).values(
+        'ingredient__name',
+        'ingredient__measurement_unit'
+    ).annotate(amount=Sum('amount')).order_by('ingredient__name')
+
+
+class Echo:
+    """File-like object that hands written lines back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+class ShoppingListExporter:
+    format = None
+    media_type = None
+    filename = 'shopping-list'
+
+    def iter_content(self, basket_ingredients):
+        raise NotImplementedError('iter_content() must be implemented.')
+
+    def get_content(self, basket_ingredients):
+        return ''.join(
+            self.iter_content(basket_ingredients.iterator())
+        ).encode('utf-8')
+
+    def get_file(self, basket_ingredients):
+        return ContentFile(
+            self.get_content(basket_ingredients),
+            name=f'{self.filename}.{self.format}',
+        )
+
+    def get_response(self, basket_ingredients):
+        response = StreamingHttpResponse(
+            self.iter_content(basket_ingredients.iterator()),
+            content_type=f'{self.media_type}; charset=utf-8',
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{self.filename}.{self.format}"'
+        )
+        return response
+
+
+class TextExporter(ShoppingListExporter):
+    format = 'txt'
+    media_type = 'text/plain'
+
+    def iter_content(self, basket_ingredients):
+        yield 'Список покупок:\n\n'
+        for ingredient in basket_ingredients:
+            yield (
+                f'- {ingredient["ingredient__name"]} - '
+                f'{ingredient["amount"]} '
+                f'{ingredient["ingredient__measurement_unit"]};\n'
+            )
+
+
+class CSVExporter(ShoppingListExporter):
+    format = 'csv'
+    media_type = 'text/csv'
+
+    def iter_content(self, basket_ingredients):
+        writer = csv.writer(Echo())
+        yield writer.writerow(('name', 'amount', 'measurement_unit'))
+        for ingredient in basket_ingredients:
+            yield writer.writerow((
+                ingredient['ingredient__name'],
+                ingredient['amount'],
+                ingredient['ingredient__measurement_unit'],
+            ))
+
+
+class JSONExporter(ShoppingListExporter):
+    format = 'json'
+    media_type = 'application/json'
+
+    def iter_content(self, basket_ingredients):
+        separator = '['
+        for ingredient in basket_ingredients:
+            yield separator + json.dumps({
+                'name': ingredient['ingredient__name'],
+                'amount': ingredient['amount'],
+                'measurement_unit': ingredient[
+                    'ingredient__measurement_unit'
+                ],
+            }, ensure_ascii=False)
+            separator = ','
+        yield '[]' if separator == '[' else ']'
+
+
+class PDFExporter(ShoppingListExporter):
+    format = 'pdf'
+    media_type = 'application/pdf'
+
+    def get_content(self, basket_ingredients):
+        return get_shopping_list_pdf_content(basket_ingredients.iterator())
+
+    def get_response(self, basket_ingredients):
+        return get_shopping_list_pdf(basket_ingredients.iterator())
+
+
+EXPORTERS = {
+    exporter.format: exporter()
+    for exporter in (PDFExporter, TextExporter, CSVExporter, JSONExporter)
+}
+
+
+def export_shopping_list(user_id, export_format):
+    """Background task: the shopping list of a user as a file."""
+    user = User.objects.get(pk=user_id)
+    return EXPORTERS[export_format].get_file(get_basket_ingredients(user))
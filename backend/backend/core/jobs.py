@@ -0,0 +1,115 @@
+"""
+Database-backed queue for work that shouldn't hold a request worker.
+
+A job names its task by dotted path and stores keyword arguments as
+JSON. Workers (``manage.py run_worker``) claim pending jobs with a
+conditional UPDATE, so several of them can share the table on any
+database backend. A task may return a ``django.core.files.File``, which
+is saved as the job result for download.
+
+A failed attempt is retried after ``JOB_RETRY_DELAY`` seconds, doubled
+for every further attempt. A job whose worker died is claimed again
+after ``JOB_TIMEOUT`` seconds, or marked failed once it has used up
+``JOB_MAX_ATTEMPTS``.
+"""
+import json
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+
+def enqueue(task, user=None, **kwargs):
+    """Queue ``task`` (a dotted path) to be called with ``kwargs``."""
+    return Job.objects.create(
+        task=task,
+        user=user,
+        kwargs=json.dumps(kwargs, ensure_ascii=False),
+    )
+
+
+def get_stale_jobs():
+    # Jobs left running longer than JOB_TIMEOUT belong to a dead worker
+    stale = timezone.now() - timedelta(seconds=settings.JOB_TIMEOUT)
+    return Q(status=Job.RUNNING, started__lt=stale)
+
+
+def fail_stale_jobs():
+    """Mark abandoned jobs without attempts left as failed."""
+    return Job.objects.filter(
+        get_stale_jobs(), attempts__gte=settings.JOB_MAX_ATTEMPTS
+    ).update(
+        status=Job.FAILED,
+        finished=timezone.now(),
+        error='Abandoned by its worker on the last attempt',
+    )
+
+
+def get_claimable_jobs():
+    return Job.objects.filter(
+        Q(status=Job.PENDING, run_after__lte=timezone.now())
+        | get_stale_jobs() & Q(attempts__lt=settings.JOB_MAX_ATTEMPTS)
+    )
+
+
+def claim_job():
+    """Mark the oldest claimable job as running and return it, or
+    return None when the queue is empty."""
+    fail_stale_jobs()
+    for job in get_claimable_jobs().order_by('run_after')[:10]:
+        claimed = Job.objects.filter(
+            pk=job.pk, status=job.status, attempts=job.attempts
+        ).update(
+            status=Job.RUNNING,
+            started=timezone.now(),
+            attempts=job.attempts + 1,
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def get_retry_delay(attempts):
+    return timedelta(
+        seconds=settings.JOB_RETRY_DELAY * 2 ** (attempts - 1)
+    )
+
+
+def run_job(job):
+    """Call the task of a claimed job and record the outcome."""
+    try:
+        result = import_string(job.task)(**json.loads(job.kwargs))
+    except Exception:
+        job.error = traceback.format_exc()
+        if job.attempts < settings.JOB_MAX_ATTEMPTS:
+            job.status = Job.PENDING
+            job.run_after = timezone.now() + get_retry_delay(job.attempts)
+        else:
+            job.status = Job.FAILED
+            job.finished = timezone.now()
+    else:
+        if result is not None:
+            job.result.save(result.name, result, save=False)
+        job.status = Job.DONE
+        job.error = ''
+        job.finished = timezone.now()
+    job.save()
+    return job
+
+
+def purge_jobs():
+    """Delete finished jobs and their results after
+    ``JOB_RESULT_TIMEOUT`` seconds."""
+    expired = timezone.now() - timedelta(seconds=settings.JOB_RESULT_TIMEOUT)
+    jobs = Job.objects.filter(
+        status__in=(Job.DONE, Job.FAILED), finished__lt=expired
+    )
+    for job in jobs.exclude(result=''):
+        job.result.delete(save=False)
+    return jobs.delete()[0]
@@ -0,0 +1,65 @@
+from django.db import migrations
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+# A copy of core.counters.COUNTERS as of this migration
+COUNTERS = {
+    'recipes.Recipe': (
+        ('users.FoodUser', 'author', 'recipes_count'),
+    ),
+    'recipes.FavouriteRecipe': (
+        ('users.FoodUser', 'user', 'favourites_count'),
+        ('recipes.Recipe', 'recipe', 'favourites_count'),
+    ),
+    'core.BasketUser': (
+        ('users.FoodUser', 'user', 'basket_count'),
+    ),
+    'recipes.Follow': (
+        ('users.FoodUser', 'author', 'followers_count'),
+        ('users.FoodUser', 'user', 'following_count'),
+    ),
+}
+
+
+def populate_counters(apps, schema_editor):
+    owners = {}
+    for model_label, counters in COUNTERS.items():
+        model = apps.get_model(model_label)
+        for owner_label, field, counter in counters:
+            owners.setdefault(owner_label, {})[counter] = Coalesce(
+                Subquery(
+                    model.objects.filter(
+                        **{field: OuterRef('pk')}
+                    ).order_by().values(field).annotate(
+                        total=Count('pk')
+                    ).values('total')
+                ),
+                0,
+            )
+
+    for owner_label, expressions in owners.items():
+        owner = apps.get_model(owner_label)
+        drift = Q()
+        for counter in expressions:
+            drift |= ~Q(**{counter: F(f'actual_{counter}')})
+        owner_ids = list(
+            owner.objects.annotate(**{
+                f'actual_{counter}': expression
+                for counter, expression in expressions.items()
+            }).filter(drift).values_list('pk', flat=True)
+        )
+        if owner_ids:
+            owner.objects.filter(pk__in=owner_ids).update(**expressions)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_auto_20220718_1958'),
+        ('recipes', '0011_recipe_favourites_count'),
+        ('users', '0002_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+"""
+Model mixins.
+"""
+
+
+class CounterFieldsMixin:
+    """Leave ``counter_fields`` out of the UPDATE of an existing row.
+
+    The counters are changed with ``F()`` updates (``core.counters``);
+    a plain ``save()`` of an instance loaded earlier, from the admin
+    change form or ``set_password()``, would write its stale values back
+    over them. Saves with explicit ``update_fields`` are left alone.
+    """
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (
+            kwargs.get('update_fields') is None
+            and not kwargs.get('force_insert')
+            and not self._state.adding
+        ):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in deferred
+                and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
@@ -1,5 +1,8 @@
+import uuid
+
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils import timezone
 
 from recipes.models import Recipe
 
@@ -32,5 +35,95 @@ class BasketUser(models.Model):
         )
 
     def recipes_count(self):
-        return self.user.basket.count()
+        return self.user.basket_count
     recipes_count.short_description = 'Количество добавленных рецептов'
+
+
+def get_job_result_path(job, filename):
+    return f'jobs/{job.pk}/{filename}'
+
+
+class Job(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+    )
+    task = models.CharField(
+        max_length=200,
+        verbose_name='Задача'
+    )
+    kwargs = models.TextField(
+        default='{}',
+        verbose_name='Аргументы в JSON'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='jobs',
+        verbose_name='Пользователь'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING,
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попытки'
+    )
+    result = models.FileField(
+        upload_to=get_job_result_path,
+        blank=True,
+        verbose_name='Результат'
+    )
+    error = models.TextField(
+        blank=True,
+        verbose_name='Ошибка'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создана'
+    )
+    run_after = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Запуск не раньше'
+    )
+    started = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Начата'
+    )
+    finished = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Завершена'
+    )
+
+    class Meta:
+        ordering = ('created',)
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = (
+            models.Index(
+                fields=('status', 'run_after'),
+                name='job_status_run_after_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.task} ({self.get_status_display()})'
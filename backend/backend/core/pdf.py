@@ -0,0 +1,71 @@
+import io
+import os
+
+from django.conf import settings
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+FONT_NAME = 'Montserrat'
+FONT_PATH = os.path.join(settings.BASE_DIR, 'Montserrat.ttf')
+
+HEADER_COLOR = (.255, .230, .238)
+FIRST_LINE = 750
+LAST_LINE = 75
+LINE_STEP = 25
+
+
+def register_fonts():
+    if FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH))
+
+
+def draw_page_frame(p):
+    # header
+    p.setFillColorRGB(*HEADER_COLOR)
+    p.rect(0, 800, 652, 50, fill=1)
+
+    p.setFont(FONT_NAME, 22)
+    p.setFillColorRGB(1, 1, 1)
+    p.drawString(100, 815, 'Список покупок:')
+    # header end
+
+    # footer
+    p.setFillColorRGB(*HEADER_COLOR)
+    p.rect(0, 0, 652, 50, fill=1)
+
+    p.setFont(FONT_NAME, 14)
+    p.setFillColorRGB(1, 1, 1)
+    p.drawString(40, 20, 'Продуктовый помощник')
+    p.drawString(300, 20, 'Разработан: https://t.me/Jony2024')
+    # footer end
+
+    p.setFont(FONT_NAME, 14)
+    p.setFillColorRGB(0, 0, 0)
+
+
+def render_shopping_list(basket_ingredients):
+    """Render the shopping list to PDF bytes, one page per
+    ``(FIRST_LINE - LAST_LINE) // LINE_STEP`` ingredients."""
+    register_fonts()
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer)
+    draw_page_frame(p)
+
+    step = FIRST_LINE
+    for ingredient in basket_ingredients:
+        if step < LAST_LINE:
+            p.showPage()
+            draw_page_frame(p)
+            step = FIRST_LINE
+        p.drawString(
+            125,
+            step,
+            f'- {ingredient["ingredient__name"]} - \
+{ingredient["amount"]} {ingredient["ingredient__measurement_unit"]};')
+        step -= LINE_STEP
+        p.line(125, step + 15, 500, step + 15)
+
+    p.showPage()
+    p.save()
+    return buffer.getvalue()
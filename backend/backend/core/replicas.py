@@ -0,0 +1,104 @@
+"""
+Read replicas for safe requests.
+
+``ReplicaMiddleware`` lets the queries of GET, HEAD and OPTIONS requests
+read from a random replica, and ``ReplicaRouter`` sends everything else
+to ``default``: writes, reads inside a transaction, reads of unsafe
+requests and reads outside requests (management commands, the job
+worker). After an unsafe request that ran an INSERT, UPDATE or DELETE,
+the client stays on ``default`` for ``DB_REPLICA_STICKY_SECONDS``, so
+it reads its own writes while the replicas catch up. The response sets
+a cookie for that, since the next request may identify the client
+differently (a login is followed by requests with the new token);
+clients that drop cookies are also remembered in the cache by their
+Authorization header, session cookie or address.
+"""
+import hashlib
+import random
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE')
+STICKY_COOKIE_NAME = 'db_primary'
+
+_state = threading.local()
+
+
+def get_replicas():
+    return [alias for alias in settings.DATABASES
+            if alias != DEFAULT_DB_ALIAS]
+
+
+def get_sticky_key(request):
+    identity = (
+        request.META.get('HTTP_AUTHORIZATION')
+        or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        or request.META.get('REMOTE_ADDR', '')
+    )
+    return f'db-sticky:{hashlib.sha1(identity.encode()).hexdigest()}'
+
+
+def record_writes(execute, sql, params, many, context):
+    # Only statements that change rows count: db_for_write also pins
+    # reads to the primary, and savepoints wrap every atomic block
+    if sql.lstrip()[:6].upper() in WRITE_STATEMENTS:
+        _state.wrote = True
+    return execute(sql, params, many, context)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        # Related objects come from the database their instance did
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        replicas = get_replicas()
+        if (
+            not replicas
+            or not getattr(_state, 'read_replica', False)
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sticky_key = get_sticky_key(request)
+        safe = request.method in SAFE_METHODS
+        _state.read_replica = safe and not (
+            STICKY_COOKIE_NAME in request.COOKIES or cache.get(sticky_key)
+        )
+        _state.wrote = False
+        try:
+            with connections[DEFAULT_DB_ALIAS].execute_wrapper(
+                record_writes
+            ):
+                response = self.get_response(request)
+        finally:
+            _state.read_replica = False
+        if not safe and _state.wrote:
+            timeout = settings.DB_REPLICA_STICKY_SECONDS
+            cache.set(sticky_key, True, timeout)
+            response.set_cookie(STICKY_COOKIE_NAME, '1', max_age=timeout,
+                                httponly=True, samesite='Lax')
+        return response
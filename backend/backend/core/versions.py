@@ -0,0 +1,51 @@
+"""
+Version tokens kept in the cache.
+
+Per-process caches remember the version they were built from and
+rebuild once it changes; writers bump the version to invalidate every
+worker that shares the cache backend. Signal receivers bump with
+:func:`bump_version_on_commit`, so a reader can't rebuild from data the
+writer hasn't committed yet and cache it under the new version.
+
+Versions are random tokens rather than counters: a bump replaces the
+token in a single ``set``, and a key the cache has evicted gets a fresh
+token instead of falling back to a value an older entry was built from.
+"""
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def new_version():
+    return uuid.uuid4().hex
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        version = new_version()
+        # Another worker may have stored one meanwhile; all must agree
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def get_versions(keys):
+    """Return the versions of ``keys``, in one cache call unless some
+    of them are missing."""
+    values = cache.get_many(keys)
+    return tuple(values[key] if key in values else get_version(key)
+                 for key in keys)
+
+
+def bump_version(key):
+    version = new_version()
+    cache.set(key, version, None)
+    return version
+
+
+def bump_version_on_commit(key):
+    """Bump ``key`` once the current transaction commits, or right away
+    outside of one."""
+    transaction.on_commit(lambda: bump_version(key))
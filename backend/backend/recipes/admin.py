@@ -1,5 +1,7 @@
 from django.contrib import admin
 
+from core.admin_filters import input_filter
+
 from .models import (FavouriteRecipe, Follow, Ingredient, IngredientRecipe,
                      Recipe, Tag)
 
@@ -8,13 +10,20 @@ class IngredientRecipeInline(admin.TabularInline):
     model = IngredientRecipe
     extra = 1
     min_num = 1
+    autocomplete_fields = ('ingredient',)
 
 
 class RecipeAdmin(admin.ModelAdmin):
     list_display = ('name', 'author', 'in_favourite_count', 'pub_date',)
+    list_select_related = ('author',)
     inlines = (IngredientRecipeInline,)
+    autocomplete_fields = ('author',)
     search_fields = ('name', 'author__username', 'tags__name',)
-    list_filter = ('author', 'name', 'tags',)
+    list_filter = (
+        input_filter('author__username', 'автору'),
+        'tags',
+    )
+    show_full_result_count = False
 
 
 class TagAdmin(admin.ModelAdmin):
@@ -26,25 +35,43 @@ class TagAdmin(admin.ModelAdmin):
 class IngredientAdmin(admin.ModelAdmin):
     list_display = ('name', 'measurement_unit',)
     search_fields = ('name',)
-    list_filter = ('name',)
+    list_filter = ('measurement_unit',)
 
 
 class IngredientRecipeAdmin(admin.ModelAdmin):
     list_display = ('ingredient', 'recipe', 'amount',)
-    search_fields = ('ingredient', 'recipe',)
-    list_filter = ('ingredient', 'recipe',)
+    list_select_related = ('ingredient', 'recipe')
+    autocomplete_fields = ('ingredient', 'recipe')
+    search_fields = ('ingredient__name', 'recipe__name',)
+    list_filter = (
+        input_filter('ingredient__name', 'ингредиенту'),
+        input_filter('recipe__name', 'рецепту'),
+    )
+    show_full_result_count = False
 
 
 class FavouriteRecipeAdmin(admin.ModelAdmin):
     list_display = ('user', 'recipe', 'recipes_count')
-    search_fields = ('recipe',)
-    list_filter = ('user', 'recipe',)
+    list_select_related = ('user', 'recipe')
+    autocomplete_fields = ('user', 'recipe')
+    search_fields = ('recipe__name', 'user__username',)
+    list_filter = (
+        input_filter('user__username', 'пользователю'),
+        input_filter('recipe__name', 'рецепту'),
+    )
+    show_full_result_count = False
 
 
 class FollowAdmin(admin.ModelAdmin):
     list_display = ('author', 'folower_count', 'folowing_count')
-    search_fields = ('user', 'author',)
-    list_filter = ('user', 'author',)
+    list_select_related = ('user', 'author')
+    autocomplete_fields = ('user', 'author')
+    search_fields = ('user__username', 'author__username',)
+    list_filter = (
+        input_filter('user__username', 'подписчику'),
+        input_filter('author__username', 'автору'),
+    )
+    show_full_result_count = False
 
 
 admin.site.register(Recipe, RecipeAdmin)
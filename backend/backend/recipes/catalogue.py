@@ -0,0 +1,133 @@
+"""
+Per-process ingredient catalogue.
+
+The ingredient table is loaded from ``ingredients.csv`` and rarely
+changes, so every worker keeps a compact copy of it: parallel arrays of
+ids, names and measurement unit indexes plus a casefolded name index
+for prefix search. Saving or deleting an ingredient bumps a version key
+in the cache; each worker compares it on access and reloads lazily.
+"""
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core import versions
+
+from .models import Ingredient
+
+VERSION_CACHE_KEY = 'ingredient-catalogue-version'
+
+
+class IngredientCatalogue:
+    __slots__ = ('version', 'ids', 'names', 'units', 'unit_indexes',
+                 'name_keys', 'name_positions')
+
+    def __init__(self, rows, version):
+        self.version = version
+        self.ids = array('q')
+        self.unit_indexes = array('H')
+        names = []
+        units = {}
+
+        for pk, name, measurement_unit in rows:
+            self.ids.append(pk)
+            names.append(name)
+            self.unit_indexes.append(
+                units.setdefault(measurement_unit, len(units))
+            )
+
+        self.names = tuple(names)
+        self.units = tuple(units)
+        ordered = sorted(
+            range(len(names)), key=lambda position: names[position].casefold()
+        )
+        self.name_keys = tuple(names[position].casefold()
+                               for position in ordered)
+        self.name_positions = array('I', ordered)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def make_ingredient(self, position):
+        return Ingredient(
+            id=self.ids[position],
+            name=self.names[position],
+            measurement_unit=self.units[self.unit_indexes[position]],
+        )
+
+    def find(self, pk):
+        position = bisect_left(self.ids, pk)
+        if position < len(self.ids) and self.ids[position] == pk:
+            return position
+        return None
+
+    def get(self, pk):
+        position = self.find(pk)
+        if position is None:
+            return None
+        return self.make_ingredient(position)
+
+    def in_bulk(self, pks):
+        found = {}
+        for pk in pks:
+            position = self.find(pk)
+            if position is not None:
+                found[pk] = self.make_ingredient(position)
+        return found
+
+    def all(self, limit=None):
+        return [self.make_ingredient(position)
+                for position in range(len(self.ids))[:limit]]
+
+    def search(self, name, limit):
+        """Positions of names starting with ``name`` first, then of
+        names containing it, at most ``limit`` in total."""
+        key = name.casefold()
+        found = []
+
+        start = bisect_left(self.name_keys, key)
+        for index in range(start, len(self.name_keys)):
+            if len(found) >= limit or not self.name_keys[index].startswith(
+                key
+            ):
+                break
+            found.append(self.name_positions[index])
+        prefix_end = start + len(found)
+
+        for index, name_key in enumerate(self.name_keys):
+            if len(found) >= limit:
+                break
+            if start <= index < prefix_end:
+                continue
+            if key in name_key:
+                found.append(self.name_positions[index])
+
+        return [self.make_ingredient(position) for position in found]
+
+
+_catalogue = None
+
+
+def get_catalogue():
+    global _catalogue
+    version = versions.get_version(VERSION_CACHE_KEY)
+    if _catalogue is None or _catalogue.version != version:
+        _catalogue = IngredientCatalogue(
+            Ingredient.objects.order_by('id').values_list(
+                'id', 'name', 'measurement_unit'
+            ),
+            version,
+        )
+    return _catalogue
+
+
+def is_enabled():
+    return settings.INGREDIENT_CATALOGUE
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def bump_version(**kwargs):
+    versions.bump_version_on_commit(VERSION_CACHE_KEY)
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+POSTGRESQL_FORWARD_SQL = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS recipes_ingredient_name_upper_prefix '
+    'ON recipes_ingredient (UPPER(name::text) text_pattern_ops)',
+    'CREATE INDEX IF NOT EXISTS recipes_ingredient_name_upper_trgm '
+    'ON recipes_ingredient USING gin (UPPER(name::text) gin_trgm_ops)',
+)
+POSTGRESQL_BACKWARD_SQL = (
+    'DROP INDEX IF EXISTS recipes_ingredient_name_upper_trgm',
+    'DROP INDEX IF EXISTS recipes_ingredient_name_upper_prefix',
+)
+
+
+def run_postgresql_sql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_auto_20220718_1937'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_postgresql_sql(POSTGRESQL_FORWARD_SQL),
+            run_postgresql_sql(POSTGRESQL_BACKWARD_SQL),
+        ),
+    ]
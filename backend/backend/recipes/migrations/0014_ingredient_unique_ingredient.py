@@ -0,0 +1,51 @@
+# Generated by Django 2.2.28 on 2026-10-18 23:10
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    """Point recipes at the first of each set of duplicate ingredients
+    and delete the others, so the unique constraint can be added."""
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    IngredientRecipe = apps.get_model('recipes', 'IngredientRecipe')
+    duplicates = Ingredient.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(
+        kept_id=Min('id'), number=Count('id')
+    ).filter(number__gt=1).order_by()
+    for duplicate in duplicates:
+        kept_id = duplicate['kept_id']
+        others = Ingredient.objects.filter(
+            name=duplicate['name'],
+            measurement_unit=duplicate['measurement_unit'],
+        ).exclude(id=kept_id)
+        for item in IngredientRecipe.objects.filter(ingredient__in=others):
+            kept = IngredientRecipe.objects.filter(
+                recipe_id=item.recipe_id, ingredient_id=kept_id
+            ).first()
+            if kept is None:
+                item.ingredient_id = kept_id
+                item.save(update_fields=['ingredient'])
+            else:
+                kept.amount += item.amount
+                kept.save(update_fields=['amount'])
+                item.delete()
+        others.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_recipe_thumbnails_ready'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique_ingredient'),
+        ),
+    ]
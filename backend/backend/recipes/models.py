@@ -3,10 +3,12 @@ from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, RegexValidator
 from django.db import models
 
+from core.mixins import CounterFieldsMixin
+
 User = get_user_model()
 
 
-class Recipe(models.Model):
+class Recipe(CounterFieldsMixin, models.Model):
     tags = models.ManyToManyField(
         'Tag',
         verbose_name='тэги',
@@ -44,17 +46,35 @@ class Recipe(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации'
     )
+    favourites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество добавлений в избранное'
+    )
+    thumbnails_ready = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Миниатюры готовы'
+    )
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='recipe_pub_date_id_idx',
+            ),
+        )
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
 
+    counter_fields = ('favourites_count',)
+
     def __str__(self):
         return self.name
 
     def in_favourite_count(self):
-        return self.favourite.count()
+        return self.favourites_count
     in_favourite_count.short_description = 'Количество добавлений в избранное'
 
 
@@ -103,6 +123,12 @@ class Ingredient(models.Model):
     class Meta:
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
+        constraints = (
+            models.UniqueConstraint(
+                fields=['name', 'measurement_unit'],
+                name='unique_ingredient',
+            ),
+        )
 
     def __str__(self):
         return self.name
@@ -169,11 +195,11 @@ class Follow(models.Model):
         ]
 
     def folower_count(self):
-        return self.user.following.count()
+        return self.user.followers_count
     folower_count.short_description = 'Количество подписок'
 
     def folowing_count(self):
-        return self.user.follower.count()
+        return self.user.following_count
     folowing_count.short_description = 'Количество подписчиков'
 
 
@@ -204,8 +230,25 @@ class FavouriteRecipe(models.Model):
 
     def __str__(self):
         return (f'{self.user.username}, '
-                f'в избранном рецептов: {self.recipes_count}')
+                f'в избранном рецептов: {self.recipes_count()}')
 
     def recipes_count(self):
-        return self.user.favourite_recipes.count()
+        return self.user.favourites_count
     recipes_count.short_description = 'Количество в избранном'
+
+
+class RecipeSnapshot(models.Model):
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='snapshot',
+        verbose_name='рецепт',
+    )
+    data = models.TextField(
+        verbose_name='представление рецепта в JSON'
+    )
+
+    class Meta:
+        verbose_name = 'Снимок рецепта'
+        verbose_name_plural = 'Снимки рецептов'
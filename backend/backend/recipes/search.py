@@ -0,0 +1,38 @@
+"""
+Ingredient name autocomplete.
+
+With ``INGREDIENT_CATALOGUE`` on, and always on backends other than
+PostgreSQL (SQLite can't fold non-ASCII case in SQL), the search runs
+over the in-process ingredient catalogue. Otherwise it runs in the
+database and is served by the ``UPPER(name)`` prefix and trigram
+indexes from migration 0009.
+"""
+from django.db import connection
+from django.db.models import Case, IntegerField, Value, When
+
+from . import catalogue
+from .models import Ingredient
+
+SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+
+def search_in_database(name, limit):
+    return Ingredient.objects.filter(
+        name__icontains=name
+    ).annotate(
+        prefix_rank=Case(
+            When(name__istartswith=name, then=Value(0)),
+            default=Value(1),
+            output_field=IntegerField(),
+        )
+    ).order_by('prefix_rank', 'name')[:limit]
+
+
+def search_ingredients(name, limit=SEARCH_LIMIT):
+    """Ingredients whose name starts with ``name`` followed by those
+    that merely contain it, at most ``limit`` in total."""
+    limit = min(limit, MAX_SEARCH_LIMIT)
+    if catalogue.is_enabled() or connection.vendor != 'postgresql':
+        return catalogue.get_catalogue().search(name, limit)
+    return search_in_database(name, limit)
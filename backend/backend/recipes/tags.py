@@ -0,0 +1,193 @@
+"""
+Per-process tag index.
+
+Maps tag slugs to ids and keeps, for every tag, the sorted ids of the
+recipes that carry it, so the recipe feed can filter by tags without
+listing distinct slugs or joining the tag table.
+
+Once committed, changes to recipe tags and deleted recipes are published
+to the cache as numbered deltas holding the ids of the recipes they
+touched. On access each worker replays the deltas it missed by
+re-reading the tags of just those recipes. Changes to tags themselves,
+and deltas the cache no longer holds, bump a version key instead, and
+each worker then reloads the whole index lazily.
+"""
+from array import array
+from bisect import bisect_left, insort
+
+from django.core.cache import cache
+from django.db import router, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from core import versions
+
+from .models import Recipe, Tag
+
+VERSION_CACHE_KEY = 'tag-index-version'
+SEQUENCE_CACHE_KEY = 'tag-index-sequence'
+
+# Deltas are kept this long, seconds; a worker further behind reloads
+DELTA_TIMEOUT = 60 * 60
+# Above this many changed recipes a worker reloads instead of replaying
+MAX_DELTA_RECIPES = 500
+
+RecipeTag = Recipe.tags.through
+
+
+def get_delta_key(sequence):
+    return f'tag-index-delta:{sequence}'
+
+
+def get_recipe_tags():
+    # Read from the primary: a lagging replica would be cached for good
+    return RecipeTag.objects.using(router.db_for_write(RecipeTag))
+
+
+class TagIndex:
+    __slots__ = ('version', 'sequence', 'slugs', 'recipe_ids')
+
+    def __init__(self, slugs, recipe_ids, version, sequence):
+        self.version = version
+        self.sequence = sequence
+        self.slugs = slugs
+        self.recipe_ids = recipe_ids
+
+    @classmethod
+    def load(cls, version, sequence):
+        slugs = dict(Tag.objects.using(
+            router.db_for_write(Tag)
+        ).values_list('slug', 'id'))
+        recipe_ids = {tag_id: array('q') for tag_id in slugs.values()}
+        for tag_id, recipe_id in get_recipe_tags().order_by(
+            'tag_id', 'recipe_id'
+        ).values_list('tag_id', 'recipe_id'):
+            recipe_ids[tag_id].append(recipe_id)
+        return cls(slugs, recipe_ids, version, sequence)
+
+    def replay(self, changed, sequence):
+        """Return a copy with the tags of the ``changed`` recipes
+        re-read from the database."""
+        recipe_ids = {tag_id: array('q', ids)
+                      for tag_id, ids in self.recipe_ids.items()}
+        for ids in recipe_ids.values():
+            for recipe_id in changed:
+                position = bisect_left(ids, recipe_id)
+                if position < len(ids) and ids[position] == recipe_id:
+                    del ids[position]
+        for tag_id, recipe_id in get_recipe_tags().filter(
+            recipe_id__in=changed
+        ).values_list('tag_id', 'recipe_id'):
+            if tag_id in recipe_ids:
+                insort(recipe_ids[tag_id], recipe_id)
+        return TagIndex(self.slugs, recipe_ids, self.version, sequence)
+
+    def get_tag_ids(self, slugs):
+        return [self.slugs[slug] for slug in slugs if slug in self.slugs]
+
+    def get_recipe_ids(self, tag_ids):
+        """Ids of recipes carrying any of ``tag_ids``."""
+        found = set()
+        for tag_id in tag_ids:
+            found.update(self.recipe_ids.get(tag_id, ()))
+        return found
+
+
+_tag_index = None
+
+
+def restart():
+    """Invalidate every index and start numbering deltas again."""
+    versions.bump_version(VERSION_CACHE_KEY)
+    cache.set(SEQUENCE_CACHE_KEY, 0, None)
+
+
+def get_sequence():
+    sequence = cache.get(SEQUENCE_CACHE_KEY)
+    if sequence is None:
+        # Numbers handed out before the key was lost could be reused
+        restart()
+        sequence = 0
+    return sequence
+
+
+def get_changed_recipe_ids(start, end):
+    """Union of the deltas after ``start`` up to ``end``, or None when
+    any of them is gone or there are too many to replay."""
+    keys = [get_delta_key(sequence) for sequence in range(start + 1, end + 1)]
+    deltas = cache.get_many(keys)
+    if len(deltas) != len(keys):
+        return None
+    changed = set().union(*deltas.values())
+    if len(changed) > MAX_DELTA_RECIPES:
+        return None
+    return changed
+
+
+def get_tag_index():
+    global _tag_index
+    # Read before the database, so a delta published meanwhile is
+    # replayed on the next access rather than skipped
+    sequence = get_sequence()
+    version = versions.get_version(VERSION_CACHE_KEY)
+    tag_index = _tag_index
+    if (
+        tag_index is not None
+        and tag_index.version == version
+        and tag_index.sequence < sequence
+    ):
+        changed = get_changed_recipe_ids(tag_index.sequence, sequence)
+        tag_index = (
+            None if changed is None
+            else tag_index.replay(changed, sequence)
+        )
+    if (
+        tag_index is None
+        or tag_index.version != version
+        or tag_index.sequence != sequence
+    ):
+        tag_index = TagIndex.load(version, sequence)
+    _tag_index = tag_index
+    return tag_index
+
+
+def get_slug_choices():
+    return [(slug, slug) for slug in get_tag_index().slugs]
+
+
+def publish(recipe_ids):
+    try:
+        sequence = cache.incr(SEQUENCE_CACHE_KEY)
+    except ValueError:
+        restart()
+        return
+    cache.set(get_delta_key(sequence), frozenset(recipe_ids), DELTA_TIMEOUT)
+
+
+def publish_on_commit(recipe_ids):
+    recipe_ids = frozenset(recipe_ids)
+    transaction.on_commit(lambda: publish(recipe_ids))
+
+
+@receiver(m2m_changed, sender=RecipeTag)
+def publish_recipe_tags(instance, action, reverse, pk_set, **kwargs):
+    if action.startswith('pre_'):
+        return
+    if reverse and action == 'post_clear':
+        # Every recipe of the tag changed; cheaper to reload than to list
+        transaction.on_commit(restart)
+    elif not reverse:
+        if action == 'post_clear' or pk_set:
+            publish_on_commit([instance.pk])
+    elif pk_set:
+        publish_on_commit(pk_set)
+
+
+@receiver(post_delete, sender=Recipe)
+def publish_deleted_recipe(instance, **kwargs):
+    publish_on_commit([instance.pk])
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def bump_version(**kwargs):
+    transaction.on_commit(restart)
@@ -0,0 +1,87 @@
+"""
+Resized WebP and JPEG variants of recipe images.
+
+Variants are stored under ``thumbnails/`` with names derived from the
+original, so their URLs can be built from the image name alone. They
+are rendered by a background job (``core.jobs``) queued when the upload
+is committed, so request workers never resize images. Until the job has
+run, ``Recipe.thumbnails_ready`` is False and the API shows no
+thumbnails; the ``make_thumbnails`` command backfills older images.
+"""
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+
+from core.jobs import enqueue
+
+from .models import Recipe
+
+THUMBNAIL_SIZES = (
+    ('small', 320),
+    ('medium', 640),
+)
+THUMBNAIL_FORMATS = (
+    ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    ('jpeg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+)
+
+
+def get_thumbnail_name(image_name, size, extension):
+    root, _ = os.path.splitext(image_name)
+    return f'thumbnails/{root}_{size}.{extension}'
+
+
+def get_thumbnail_urls(image_name):
+    """Return ``{size: {format: url}}`` for the variants of an image."""
+    return {
+        size: {
+            extension: default_storage.url(
+                get_thumbnail_name(image_name, size, extension)
+            )
+            for extension, _, _ in THUMBNAIL_FORMATS
+        }
+        for size, _ in THUMBNAIL_SIZES
+    }
+
+
+def make_thumbnails(image_name):
+    """Render and store every variant of ``image_name``."""
+    with default_storage.open(image_name, 'rb') as f:
+        image = Image.open(f)
+        largest = max(width for _, width in THUMBNAIL_SIZES)
+        # Let the JPEG decoder scale down while decoding
+        image.draft('RGB', (largest, largest))
+        image.load()
+
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+    for size, width in THUMBNAIL_SIZES:
+        thumbnail = image.copy()
+        thumbnail.thumbnail((width, width * 4))
+        for extension, image_format, params in THUMBNAIL_FORMATS:
+            variant = thumbnail
+            if image_format == 'JPEG' and variant.mode != 'RGB':
+                variant = variant.convert('RGB')
+            buffer = BytesIO()
+            variant.save(buffer, image_format, **params)
+            name = get_thumbnail_name(image_name, size, extension)
+            default_storage.delete(name)
+            default_storage.save(name, ContentFile(buffer.getvalue()))
+    mark_thumbnails_ready(image_name)
+
+
+def mark_thumbnails_ready(image_name):
+    # Saved one by one, so the signals refresh snapshots and caches
+    for recipe in Recipe.objects.filter(image=image_name,
+                                        thumbnails_ready=False):
+        recipe.thumbnails_ready = True
+        recipe.save(update_fields=('thumbnails_ready',))
+
+
+def schedule_thumbnails(image_name):
+    """Queue rendering of the variants of ``image_name``."""
+    return enqueue('recipes.thumbnails.make_thumbnails', image_name=image_name)
@@ -1,5 +1,7 @@
 from django.contrib import admin
 
+from core.admin_filters import input_filter
+
 from .models import FoodUser
 
 
@@ -8,7 +10,7 @@ class FoodUserAdmin(admin.ModelAdmin):
                     'username',
                     'folower_count',
                     'folowing_count',)
-    list_filter = ('username',)
+    list_filter = (input_filter('username', 'имени пользователя'),)
     search_fields = ('username', 'email')
     ordering = ('username',)
 
@@ -3,10 +3,12 @@ from django.core.validators import RegexValidator
 from django.db import models
 from django.utils import timezone
 
+from core.mixins import CounterFieldsMixin
+
 from .managers import FoodManager
 
 
-class FoodUser(AbstractBaseUser, PermissionsMixin):
+class FoodUser(CounterFieldsMixin, AbstractBaseUser, PermissionsMixin):
     email = models.EmailField(
         max_length=254,
         unique=True,
@@ -50,6 +52,31 @@ class FoodUser(AbstractBaseUser, PermissionsMixin):
         default=timezone.now,
         verbose_name='Время создания'
     )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество рецептов'
+    )
+    favourites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество в избранном'
+    )
+    basket_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество в корзине'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество подписчиков'
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество подписок'
+    )
 
     class Meta:
         verbose_name = "Пользователь"
@@ -57,6 +84,9 @@ class FoodUser(AbstractBaseUser, PermissionsMixin):
 
     objects = FoodManager()
 
+    counter_fields = ('recipes_count', 'favourites_count', 'basket_count',
+                      'followers_count', 'following_count')
+
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
 
@@ -64,9 +94,9 @@ class FoodUser(AbstractBaseUser, PermissionsMixin):
         return self.username
 
     def folower_count(self):
-        return self.following.count()
+        return self.followers_count
     folower_count.short_description = 'Количество подписчиков'
 
     def folowing_count(self):
-        return self.follower.count()
+        return self.following_count
     folowing_count.short_description = 'Количество подписок'
@@ -1,3 +1,6 @@
+uwsgi_cache_path /var/cache/nginx/api levels=1:2 keys_zone=api:10m
+                 max_size=100m inactive=10m;
+
 server {
     listen ${LISTEN_PORT};
     server_name 84.201.142.34;
@@ -13,7 +16,7 @@ server {
     }
 
     location /api/ {
-        try_files $uri @proxy_api;
+        try_files $uri @proxy_api_cached;
     }
     location /admin/ {
         try_files $uri @proxy_api;
@@ -23,6 +26,22 @@ server {
         include                 /etc/nginx/uwsgi_params;
         client_max_body_size    10M;
     }
+    # Anonymous API reads are kept for a few seconds and then revalidated
+    # with If-None-Match against the backend ETag
+    location @proxy_api_cached {
+        uwsgi_pass              ${APP_HOST}:${APP_PORT};
+        include                 /etc/nginx/uwsgi_params;
+        client_max_body_size    10M;
+        uwsgi_cache             api;
+        uwsgi_cache_key         $scheme$host$request_method$request_uri$http_accept;
+        uwsgi_cache_bypass      $http_authorization;
+        uwsgi_no_cache          $http_authorization;
+        uwsgi_ignore_headers    Cache-Control Expires;
+        uwsgi_cache_valid       200 5s;
+        uwsgi_cache_revalidate  on;
+        uwsgi_cache_use_stale   updating;
+        add_header              X-Cache-Status $upstream_cache_status;
+    }
 
     location / {
         root /usr/share/nginx/html;